@@ -1,5 +1,5 @@
 """
-Runner: creates/refreshes Gold views (daily/monthly by UF).
+Runner: creates/refreshes Gold tables (daily/monthly by UF + 30d/12m windows).
 """
 from __future__ import annotations
 
@@ -14,13 +14,33 @@ if str(SRC) not in sys.path:
 
 from case_indicium.utils.config import DUCKDB_PATH
 
+GOLD_TABLES = ("fct_daily_uf", "fct_monthly_uf", "fct_daily_uf_30d", "fct_monthly_uf_12m")
+
+
+def _drop_legacy_views(con: duckdb.DuckDBPyConnection) -> None:
+    """Drop gold views left by older builds (CREATE OR REPLACE TABLE can't replace a view)."""
+    rows = con.execute(
+        """
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = 'gold'
+          AND table_type = 'VIEW'
+          AND table_name IN (SELECT unnest(?::VARCHAR[]))
+        """,
+        [list(GOLD_TABLES)],
+    ).fetchall()
+    for (name,) in rows:
+        con.execute(f"DROP VIEW gold.{name};")
+
+
 def main() -> None:
     sql_path = SRC / "case_indicium" / "sql" / "gold_views.sql"
     sql = sql_path.read_text(encoding="utf-8")
     con = duckdb.connect(str(DUCKDB_PATH))
+    _drop_legacy_views(con)
     con.execute(sql)
     con.close()
-    print("[runner] gold views created: gold.fct_daily_uf, gold.fct_monthly_uf")
+    print("[runner] gold tables created: " + ", ".join(f"gold.{t}" for t in GOLD_TABLES))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,214 @@
+# src/case_indicium/agent/cache.py
+"""
+Small two-level cache for report generation.
+
+What is cached
+--------------
+- KPI/series bundles: they depend only on (scope, uf, as_of_day) and the data
+  itself, so once the as_of day is known (one cheap query) a rerun can skip the
+  whole SQL phase. The key also carries a data version (the DuckDB file mtime,
+  like the webapp's `_data_version()`), so an ETL reload that keeps the same
+  as_of day still invalidates old bundles. Bundles live in an in-process
+  `functools.lru_cache` and as JSON files under REPORT_CACHE_DIR
+  (`bundle_{scope}_{uf}_{as_of}_{data_version}_{version}.json`).
+- LLM completions: keyed on sha256(system_prompt + user_payload) and stored as
+  JSON under REPORT_CACHE_DIR/llm, so identical prompts replay from disk.
+  Callers may pass `max_age_s` to expire entries (e.g. NL→SQL uses 24h;
+  intent routing and data-dictionary answers use 10 minutes).
+
+Pruning: writing a bundle replaces the older files for the same (scope, uf),
+and entries stored with `max_age_s` carry an expiry that is swept from disk on
+write (at most every LLM_PRUNE_INTERVAL_S per process), so the directory stays
+bounded in a long-running app.
+
+The report markdown itself is never cached; it is re-rendered from the bundle.
+Set REPORT_CACHE=0 to bypass both layers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .settings import REPORT_CACHE_DIR, REPORT_CACHE_ENABLED
+
+# Bump whenever the SQL bundle (queries or payload shape) changes.
+BUNDLE_VERSION = "v2"
+
+# Minimum seconds between sweeps of expired LLM entries.
+LLM_PRUNE_INTERVAL_S = 600
+_last_llm_prune = 0.0
+
+log = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^0-9A-Za-z_-]")
+
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def _slug(value: Any) -> str:
+    return _UNSAFE_CHARS.sub("", str(value))
+
+
+def _bundle_prefix(scope: str, uf: Optional[str]) -> str:
+    return f"bundle_{_slug(scope)}_{_slug(uf or 'all')}_"
+
+
+def _bundle_path(
+    scope: str, uf: Optional[str], as_of_day: str, data_version: Optional[int], version: str
+) -> Path:
+    name = (
+        f"{_bundle_prefix(scope, uf)}{_slug(as_of_day)}"
+        f"_{_slug(data_version or 0)}_{_slug(version)}.json"
+    )
+    return REPORT_CACHE_DIR / name
+
+
+def _llm_path(user_content: str, system_content: str) -> Path:
+    key = hashlib.sha256((system_content + user_content).encode("utf-8")).hexdigest()
+    return REPORT_CACHE_DIR / "llm" / f"{key}.json"
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    """Atomic best-effort write; cache failures never break a report."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as exc:
+        log.warning("cache write failed (%s): %s", path, exc)
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass  # already gone (another process pruned it) or not removable
+
+
+def _prune_bundles(keep: Path, prefix: str) -> None:
+    """Drop superseded bundles (older as_of/data/bundle version) for the same (scope, uf)."""
+    for old in keep.parent.glob(f"{prefix}*.json"):
+        if old != keep:
+            _unlink_quietly(old)
+
+
+def _prune_llm(now: float) -> None:
+    """Delete LLM entries whose expiry has passed; throttled per process."""
+    global _last_llm_prune
+    if now - _last_llm_prune < LLM_PRUNE_INTERVAL_S:
+        return
+    _last_llm_prune = now
+    for path in (REPORT_CACHE_DIR / "llm").glob("*.json"):
+        try:
+            expires_at = json.loads(path.read_text(encoding="utf-8")).get("expires_at")
+        except (OSError, ValueError, AttributeError):
+            continue
+        if expires_at is not None and float(expires_at) < now:
+            _unlink_quietly(path)
+
+
+# -----------------------------------------------------------------------------
+# KPI/series bundles
+# -----------------------------------------------------------------------------
+
+@lru_cache(maxsize=64)
+def _cached_bundle(
+    scope: str, uf: Optional[str], as_of_day: str, data_version: Optional[int], _v: str
+) -> Dict[str, Any]:
+    """Load a bundle from disk. Misses raise, so they are not memoized."""
+    path = _bundle_path(scope, uf, as_of_day, data_version, _v)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def get_bundle(
+    scope: str,
+    uf: Optional[str],
+    as_of_day: Optional[str],
+    compute: Callable[[], Dict[str, Any]],
+    *,
+    data_version: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Return the KPI/series bundle for (scope, uf, as_of_day), computing it on a miss.
+
+    `data_version` should change whenever the underlying data does (callers
+    pass the DuckDB file mtime). `compute` must return a JSON-serializable
+    dict. The returned dict may be shared with other callers, so treat it as
+    read-only.
+    """
+    if not REPORT_CACHE_ENABLED or as_of_day is None:
+        return compute()
+    try:
+        return _cached_bundle(scope, uf, str(as_of_day), data_version, BUNDLE_VERSION)
+    except (OSError, ValueError):
+        pass
+    bundle = compute()
+    path = _bundle_path(scope, uf, str(as_of_day), data_version, BUNDLE_VERSION)
+    _write_json(path, bundle)
+    _prune_bundles(path, _bundle_prefix(scope, uf))
+    return bundle
+
+
+# -----------------------------------------------------------------------------
+# LLM completions
+# -----------------------------------------------------------------------------
+
+def load_completion(
+    user_content: str, system_content: str, *, max_age_s: Optional[float] = None
+) -> Optional[str]:
+    """Return a previously stored completion for this exact prompt pair, if any.
+
+    With `max_age_s`, entries older than that (or without a timestamp) are ignored.
+    """
+    if not REPORT_CACHE_ENABLED:
+        return None
+    try:
+        data = json.loads(_llm_path(user_content, system_content).read_text(encoding="utf-8"))
+        if max_age_s is not None and time.time() - float(data.get("created_at", 0)) > max_age_s:
+            return None
+        return str(data["text"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def store_completion(
+    user_content: str, system_content: str, text: str, *, max_age_s: Optional[float] = None
+) -> None:
+    """Persist a successful completion for later replay.
+
+    Pass the same `max_age_s` the reader uses, so the entry is deleted from disk
+    once it can no longer be replayed (entries without it are kept).
+    """
+    if not REPORT_CACHE_ENABLED:
+        return
+    now = time.time()
+    entry: Dict[str, Any] = {"text": text, "created_at": now}
+    if max_age_s is not None:
+        entry["expires_at"] = now + max_age_s
+    _write_json(_llm_path(user_content, system_content), entry)
+    _prune_llm(now)
+
+
+def clear_memory_cache() -> None:
+    """Drop the in-process bundle layer (disk files are kept)."""
+    _cached_bundle.cache_clear()
+
+
+__all__ = [
+    "BUNDLE_VERSION",
+    "get_bundle",
+    "load_completion",
+    "store_completion",
+    "clear_memory_cache",
+]
@@ -4,34 +4,39 @@ Report generation orchestration for the SRAG agent.
 
 This module pulls KPIs and time series from DuckDB, fetches recent SRAG news,
 assembles a structured prompt, calls the LLM to produce a narrative, and
-renders a final Markdown report via Jinja2.
+renders a final Markdown report via Jinja2. `run_reports` does the same for
+many scopes at once, overlapping the SQL and LLM round-trips with asyncio.
 
 Design goals:
 - Clear separation of concerns (data fetch, prompt build, LLM call, rendering)
 - Dependency injection for SQL client, news provider and LLM generator (easy to test)
 - Defensive typing and logging for observability
+- KPI/series bundles and LLM completions are cached per as_of day (see cache.py)
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Tuple
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from .sql_client import SQLClient
-from .metrics import get_as_of_day, get_daily_30d_br, get_kpis_30d_br, get_monthly_12m_br
-from .news_client import fetch_recent_news_srag
+from .metrics import get_as_of_day, get_kpis_30d, get_series_bundle_columnar
+from .news_client import fetch_recent_news_srag, rank_cached_news
 from .prompt import SYSTEM_PROMPT_PT, build_user_prompt
-from .schemas import ReportInput, ReportOutput
+from .schemas import KPIs30d, ReportInput, ReportOutput, Series, SeriesColumnar
+from .cache import get_bundle, load_completion, store_completion
 
 # ------------------------------------------------------------------------------
 # Constants & logger
 # ------------------------------------------------------------------------------
 TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
 DEFAULT_NEWS_LIMIT = 5
+DEFAULT_LLM_CONCURRENCY = 8
 
 log = logging.getLogger(__name__)
 
@@ -39,24 +44,6 @@ log = logging.getLogger(__name__)
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
-def _series_to_points(series) -> list[dict]:
-    """
-    Convert a Series(pydantic) into a list of {'x': iso-date, 'y': float} dicts.
-    NaN and non-numeric 'y' are filtered out.
-    """
-    out: list[dict] = []
-    for p in getattr(series, "points", []) or []:
-        x = p.x.isoformat() if hasattr(p.x, "isoformat") else str(p.x)
-        try:
-            y = float(p.y)
-        except Exception:
-            continue
-        # filter NaN (self-inequality check)
-        if y == y:
-            out.append({"x": x, "y": y})
-    return out
-
-
 def _render_report_md(
     body_md: str,
     *,
@@ -88,6 +75,103 @@ def _render_report_md(
     return tpl.render(body_md=body_md, daily_png=daily_png, monthly_png=monthly_png)
 
 
+def _scope_key(scope: str, uf: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Normalize (scope, uf): ('br', None) or ('uf', 'SP'); scope='uf' needs a UF code."""
+    if scope != "uf":
+        return "br", None
+    code = (uf or "").strip().upper()
+    if not code:
+        raise ValueError("scope='uf' requires a UF code")
+    return "uf", code
+
+
+def _db_mtime(sql: SQLClient) -> Optional[int]:
+    """DuckDB file mtime (ns) used as the bundle data version; None if unknown."""
+    try:
+        return sql.db_path.stat().st_mtime_ns
+    except (AttributeError, OSError):
+        return None
+
+
+def _fetch_report_data(sql: SQLClient, scope: str = "br", uf: Optional[str] = None) -> dict:
+    """
+    Run the DuckDB side of the report for BR (scope='br') or one UF.
+
+    Only the as_of day is always queried; KPIs and series come from the
+    (scope, uf, as_of_day) bundle cache when available, keyed also on the
+    DuckDB file mtime so an ETL reload invalidates it. Values are plain
+    dicts here (series in columnar {"x", "y"} form); pydantic models are
+    built in `_report_output`.
+    """
+    scope, uf = _scope_key(scope, uf)
+    as_of_day = get_as_of_day(sql)
+
+    def _compute() -> dict:
+        series = get_series_bundle_columnar(sql, uf)
+        return {
+            "kpis": get_kpis_30d(sql, uf).model_dump(),
+            "daily": series["daily"].to_dict(),
+            "monthly": series["monthly"].to_dict(),
+        }
+
+    bundle = get_bundle(scope, uf, as_of_day, _compute, data_version=_db_mtime(sql))
+    return {"scope": scope, "uf": uf, "as_of_day": as_of_day, **bundle}
+
+
+def _build_report_prompt(data: dict, news: List) -> str:
+    """Assemble the structured user prompt for one report."""
+    # The notes below clarify the interpretation of certain indicators.
+    notes = [
+        "ICU rate represents the % of cases with an ICU stay (it is NOT bed occupancy).",
+        "Vaccinated rate is the % among notified cases (it is NOT population coverage).",
+    ]
+    return build_user_prompt(
+        scope=data["scope"],
+        uf=data["uf"],
+        as_of_day=data["as_of_day"],
+        kpis=data["kpis"],
+        daily_series_30d=SeriesColumnar.from_dict(data["daily"]),
+        monthly_series_12m=SeriesColumnar.from_dict(data["monthly"]),
+        news=[n.dict() for n in news],
+        notes=notes,
+    )
+
+
+def _fallback_body_md() -> str:
+    return (
+        "## Report generation unavailable\n\n"
+        "An error occurred while generating the narrative. "
+        "The KPIs and time series below remain valid.\n"
+    )
+
+
+def _report_output(data: dict, news: List, body_md: str) -> ReportOutput:
+    """Render the final Markdown and wrap everything into a ReportOutput."""
+    as_of_day = data["as_of_day"]
+    return ReportOutput(
+        kpis=KPIs30d(**data["kpis"]),
+        daily_series_30d=Series(
+            label="daily_cases_30d", points=SeriesColumnar.from_dict(data["daily"]).to_points()
+        ),
+        monthly_series_12m=Series(
+            label="monthly_cases_12m", points=SeriesColumnar.from_dict(data["monthly"]).to_points()
+        ),
+        news=news,
+        report_md=_render_report_md(body_md, daily_png=None, monthly_png=None),
+        assets=[],
+        as_of_day=str(as_of_day) if as_of_day is not None else None,
+    )
+
+
+def _fetch_news(news_fetcher: Callable[[int], List], sql: SQLClient) -> List:
+    """Fetch from the provider; on failure, rank the on-disk news cache in DuckDB."""
+    try:
+        return news_fetcher(limit=DEFAULT_NEWS_LIMIT)
+    except Exception as e:
+        log.warning("news_fetcher failed: %s", e)
+        return rank_cached_news(sql, DEFAULT_NEWS_LIMIT)
+
+
 # ------------------------------------------------------------------------------
 # Public API
 # ------------------------------------------------------------------------------
@@ -99,15 +183,16 @@ def build_report(
     llm_generate: Optional[Callable[[str, str], str]] = None,
 ) -> ReportOutput:
     """
-    Build the SRAG report (currently BR-scope). Uses dependency injection to
+    Build the SRAG report for Brazil or one UF. Uses dependency injection to
     allow alternative SQL clients, news providers, and LLM backends in tests.
 
     Parameters
     ----------
     inp : ReportInput
-        Report scope payload. At the moment, only 'br' is supported in this function.
+        Report scope payload: scope='br', or scope='uf' with a UF code.
     sql : Optional[SQLClient]
-        Custom SQLClient (for tests/mocks). Defaults to a new SQLClient().
+        Custom SQLClient (for tests/mocks). Defaults to a new SQLClient(),
+        closed before returning.
     news_fetcher : Callable[[int], List]
         Function that fetches news items, signature: (limit) -> List[NewsItem].
     llm_generate : Optional[Callable[[str, str], str]]
@@ -117,76 +202,51 @@ def build_report(
     -------
     ReportOutput
         Structured report with KPIs, series, news, markdown and assets list.
-
-    Notes
-    -----
-    - If `inp.scope == "uf"`, this function will still fetch BR aggregates and log a warning.
-      A dedicated UF-aware variant can be implemented if needed.
     """
     t0 = time.perf_counter()
+    owns_sql = sql is None
     sql = sql or SQLClient()
 
-    if inp.scope != "br":
-        log.warning("build_report currently supports BR scope only. Received scope=%s", inp.scope)
-
-    # --- Fetch data (DuckDB) ---------------------------------------------------
-    t_db = time.perf_counter()
-    as_of_day = get_as_of_day(sql)
-    kpis = get_kpis_30d_br(sql)
-    daily = get_daily_30d_br(sql)
-    monthly = get_monthly_12m_br(sql)
-    db_ms = int((time.perf_counter() - t_db) * 1000)
-
-    daily_points = _series_to_points(daily)
-    monthly_points = _series_to_points(monthly)
-
-    # --- Fetch news (cached/provider) -----------------------------------------
-    t_news = time.perf_counter()
     try:
-        news = news_fetcher(limit=DEFAULT_NEWS_LIMIT)
-    except Exception as e:
-        log.warning("news_fetcher failed: %s", e)
-        news = []
-    news_ms = int((time.perf_counter() - t_news) * 1000)
+        # --- Fetch data (DuckDB) -----------------------------------------------
+        t_db = time.perf_counter()
+        data = _fetch_report_data(sql, inp.scope, inp.uf)
+        db_ms = int((time.perf_counter() - t_db) * 1000)
+
+        # --- Fetch news (cached/provider) -------------------------------------
+        t_news = time.perf_counter()
+        news = _fetch_news(news_fetcher, sql)
+        news_ms = int((time.perf_counter() - t_news) * 1000)
+    finally:
+        if owns_sql:
+            sql.close()  # release the DuckDB file lock before the (slow) LLM call
 
     # --- Build LLM prompt (PT-BR system prompt remains intentional) ------------
-    # The notes below clarify the interpretation of certain indicators.
-    notes = [
-        "ICU rate represents the % of cases with an ICU stay (it is NOT bed occupancy).",
-        "Vaccinated rate is the % among notified cases (it is NOT population coverage).",
-    ]
-    user_prompt = build_user_prompt(
-        scope="br",
-        uf=None,
-        as_of_day=as_of_day,
-        kpis=kpis.dict(),
-        daily_series_30d=daily_points,
-        monthly_series_12m=monthly_points,
-        news=[n.dict() for n in news],
-        notes=notes,
-    )
+    user_prompt = _build_report_prompt(data, news)
 
     # --- LLM text generation ---------------------------------------------------
     # Lazy import to avoid circular deps on module load.
     from .llm_router import generate_text  # noqa: WPS433 (intentional late import)
 
     if llm_generate is None:
-        llm_generate = lambda u, s: generate_text(u, s, temperature=0.2, max_tokens=1200)  # noqa: E731
+        def llm_generate(u: str, s: str) -> str:
+            cached = load_completion(u, s)
+            if cached is not None:
+                return cached
+            text = generate_text(u, s, temperature=0.2, max_tokens=1200)
+            store_completion(u, s, text)
+            return text
 
     t_llm = time.perf_counter()
     try:
         body_md = llm_generate(user_prompt, SYSTEM_PROMPT_PT)
     except Exception as e:
         log.exception("LLM generation failed: %s", e)
-        body_md = (
-            "## Report generation unavailable\n\n"
-            "An error occurred while generating the narrative. "
-            "The KPIs and time series below remain valid.\n"
-        )
+        body_md = _fallback_body_md()
     llm_ms = int((time.perf_counter() - t_llm) * 1000)
 
-    # --- Render final Markdown -------------------------------------------------
-    final_md = _render_report_md(body_md, daily_png=None, monthly_png=None)
+    # --- Render final Markdown + structured output ----------------------------
+    out = _report_output(data, news, body_md)
 
     # --- Log timing ------------------------------------------------------------
     total_ms = int((time.perf_counter() - t0) * 1000)
@@ -198,14 +258,98 @@ def build_report(
         llm_ms,
         len(news),
     )
+    return out
 
-    # --- Return structured output ---------------------------------------------
-    return ReportOutput(
-        kpis=kpis,
-        daily_series_30d=daily,
-        monthly_series_12m=monthly,
-        news=news,
-        report_md=final_md,
-        assets=[],
-        as_of_day=str(as_of_day) if as_of_day is not None else None,
+
+async def run_reports(
+    scopes: List[Tuple[str, Optional[str]]],
+    *,
+    sql: Optional[SQLClient] = None,
+    news_fetcher: Callable[[int], List] = fetch_recent_news_srag,
+    max_concurrency: int = DEFAULT_LLM_CONCURRENCY,
+) -> List[ReportOutput]:
+    """
+    Build several reports concurrently (e.g. BR + every UF).
+
+    Runs in two phases. First all DuckDB work (news + one data fetch per scope)
+    runs in worker threads, one pooled cursor each, and an owned client is
+    closed so the file lock is not held during the LLM round-trips. Then the
+    LLM calls are fired together through the async client, bounded by a
+    semaphore so we stay under provider rate limits. Wall-clock is roughly the
+    slowest report instead of the sum of all of them.
+
+    Parameters
+    ----------
+    scopes : List[Tuple[str, Optional[str]]]
+        (scope, uf) pairs, e.g. [("br", None), ("uf", "SP")]. Same scope
+        semantics as `build_report`; repeated pairs are built once.
+    sql : Optional[SQLClient]
+        Parent client; workers borrow pooled cursors. Defaults to a new
+        SQLClient(), closed before the LLM phase.
+    news_fetcher : Callable[[int], List]
+        News provider; called once and shared by every report.
+    max_concurrency : int
+        Maximum number of in-flight LLM requests.
+
+    Returns
+    -------
+    List[ReportOutput]
+        One output per scope, in the same order as `scopes`.
+    """
+    from .llm_router import agenerate_text  # noqa: WPS433 (intentional late import)
+
+    t0 = time.perf_counter()
+    inputs = [ReportInput(scope=scope, uf=uf) for scope, uf in scopes]
+    keys = [_scope_key(inp.scope, inp.uf) for inp in inputs]
+    owns_sql = sql is None
+    sql = sql or SQLClient()
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+
+    def _pooled(fn, *args):
+        with sql.pooled() as cur:
+            return fn(cur, *args)
+
+    def _news(cur: SQLClient) -> List:
+        return _fetch_news(news_fetcher, cur)
+
+    async def _one(data: dict) -> ReportOutput:
+        user_prompt = _build_report_prompt(data, news)
+        body_md = load_completion(user_prompt, SYSTEM_PROMPT_PT)
+        if body_md is None:
+            async with sem:
+                try:
+                    body_md = await agenerate_text(
+                        user_prompt, SYSTEM_PROMPT_PT, temperature=0.2, max_tokens=1200
+                    )
+                    store_completion(user_prompt, SYSTEM_PROMPT_PT, body_md)
+                except Exception as e:
+                    log.exception(
+                        "LLM generation failed (scope=%s uf=%s): %s", data["scope"], data["uf"], e
+                    )
+                    body_md = _fallback_body_md()
+        return _report_output(data, news, body_md)
+
+    unique = list(dict.fromkeys(keys))  # one report (and LLM call) per distinct scope
+    # Phase 1: all DuckDB work, then release the file lock before the (slow) LLM calls.
+    try:
+        news = await asyncio.to_thread(_pooled, _news)
+        datas = await asyncio.gather(
+            *(asyncio.to_thread(_pooled, _fetch_report_data, scope, uf) for scope, uf in unique)
+        )
+    finally:
+        if owns_sql:
+            sql.close()
+    t_db = time.perf_counter()
+
+    # Phase 2: semaphore-bounded LLM calls, no DuckDB handle held.
+    built = await asyncio.gather(*(_one(data) for data in datas))
+    by_key = dict(zip(unique, built))
+    outputs = [by_key[k] for k in keys]
+    log.info(
+        "reports_generated n=%d unique=%d db_ms=%d total_ms=%d",
+        len(outputs),
+        len(unique),
+        int((t_db - t0) * 1000),
+        int((time.perf_counter() - t0) * 1000),
     )
+    return outputs
@@ -8,7 +8,8 @@ Goals
 - Fallback to lightweight rules only if the LLM can't classify.
 - Distinguish: greet | news | report | explain | dataqa | nlquery | trend | compare | chitchat | unknown.
 - Extract: scope ('br'|'uf'), UF code, metric id, days_back window (1|7|30|90).
-- Provide a single `handle()` entrypoint for the UI (Streamlit/CLI).
+- Provide a single `handle()` entrypoint for the UI (Streamlit/CLI), plus
+  `handle_stream()` for UIs that render the reply incrementally.
 
 Environment
 -----------
@@ -24,13 +25,15 @@ Notes
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Tuple, List, Literal
+from typing import Iterator, Optional, Dict, Tuple, List, Literal
 import os
 import re
 import unicodedata
 
 from pydantic import BaseModel, Field, ValidationError
 
+from .cache import load_completion, store_completion
+
 
 # =============================================================================
 # Public data model
@@ -50,13 +53,18 @@ class Intent:
 # Normalization helpers
 # =============================================================================
 
+_WS_RE = re.compile(r"\s+")
+# U+0300..U+036F (combining diacritics) -> deleted by str.translate
+_COMBINING_DROP = dict.fromkeys(range(0x0300, 0x036F + 1))
+
+
 def _normalize(s: str) -> str:
     """Lowercase, strip accents, collapse whitespace; keep alnum + spaces."""
     s = (s or "").lower().strip()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    s = re.sub(r"\s+", " ", s)
-    return s
+    if not s.isascii():
+        # NFD splits accented letters; translate drops the combining marks in C.
+        s = unicodedata.normalize("NFD", s).translate(_COMBINING_DROP)
+    return _WS_RE.sub(" ", s)
 
 
 # =============================================================================
@@ -109,6 +117,11 @@ Usuário: "tem novidades de SRAG em Pernambuco hoje?"
 """
 
 
+# Classification depends only on (text, previous_intent), both part of the
+# prompt, so a repeated question replays the stored routing for 10 minutes.
+_CLASSIFY_CACHE_TTL_S = 600
+
+
 def _llm_classify(user_text: str, previous_intent: Intent | None) -> Intent:
     """Ask the LLM to classify intent; return Intent object (or unknown)."""
     from .llm_router import generate_text
@@ -127,7 +140,10 @@ def _llm_classify(user_text: str, previous_intent: Intent | None) -> Intent:
         f"{ctx}\n"
         "Responda apenas JSON."
     )
-    raw = generate_text(user_payload, _LLM_SYSTEM, temperature=0.0, max_tokens=320)
+    raw = load_completion(user_payload, _LLM_SYSTEM, max_age_s=_CLASSIFY_CACHE_TTL_S)
+    cached = raw is not None
+    if not cached:
+        raw = generate_text(user_payload, _LLM_SYSTEM, temperature=0.0, max_tokens=320)
 
     try:
         data = LLMIntent.model_validate_json(raw).model_dump()
@@ -138,6 +154,8 @@ def _llm_classify(user_text: str, previous_intent: Intent | None) -> Intent:
             data = LLMIntent.model_validate(json.loads(raw)).model_dump()
         except Exception:
             return Intent(kind="unknown", confidence=0.0)
+    if not cached:
+        store_completion(user_payload, _LLM_SYSTEM, raw, max_age_s=_CLASSIFY_CACHE_TTL_S)  # only replies that parsed
 
     return Intent(
         kind=data["kind"],
@@ -163,15 +181,19 @@ _UF_BY_NAME: Dict[str, str] = {
     "sergipe": "SE", "tocantins": "TO",
 }
 _UF_CODES = set(_UF_BY_NAME.values())
+_UF_SIGLA_RE = re.compile(r"\b([A-Z]{2})\b")
+_UF_NAME_RES: Tuple[Tuple["re.Pattern[str]", str], ...] = tuple(
+    (re.compile(rf"\b{name}\b"), code) for name, code in _UF_BY_NAME.items()
+)
 
 def _detect_uf_and_scope(orig_text: str) -> Tuple[str, Optional[str]]:
     """Return ('uf'|'br', UF_CODE|None) scanning sigla or full name."""
-    m = re.search(r"\b([A-Z]{2})\b", orig_text or "")
+    m = _UF_SIGLA_RE.search(orig_text or "")
     if m and m.group(1) in _UF_CODES:
         return "uf", m.group(1)
     t = _normalize(orig_text)
-    for name, code in _UF_BY_NAME.items():
-        if re.search(rf"\b{name}\b", t):
+    for name_re, code in _UF_NAME_RES:
+        if name_re.search(t):
             return "uf", code
     return "br", None
 
@@ -198,9 +220,14 @@ _METRIC_ALIASES: Dict[str, str] = {
     "vaccinated rate": "vaccinated_rate_30d",
 }
 
+# Longest phrase first, sorted once.
+_METRIC_ALIASES_BY_LEN: Tuple[Tuple[str, str], ...] = tuple(
+    sorted(_METRIC_ALIASES.items(), key=lambda x: -len(x[0]))
+)
+
 def _detect_metric(t_norm: str) -> Optional[str]:
     """Phrase-first; fallback token check for cfr/crf."""
-    for k, mid in sorted(_METRIC_ALIASES.items(), key=lambda x: -len(x[0])):
+    for k, mid in _METRIC_ALIASES_BY_LEN:
         if k in t_norm:
             return mid
     tokens = t_norm.split()
@@ -303,12 +330,30 @@ def greet_message() -> str:
 # Unified handler for the UI (returns reply + resolved intent)
 # =============================================================================
 
-def handle(user_text: str, previous_intent: Intent | None = None) -> tuple[str, Intent]:
-    """
-    Routes the user text to the right feature and returns Markdown + Intent.
-    """
+_CHITCHAT_SYSTEM = (
+    "Você é um assistente PT-BR do projeto SRAG. "
+    "Responda de forma breve e útil. Não invente números epidemiológicos; "
+    "se pedirem dados, sugira usar relatório ou consulta."
+)
+
+_NO_NEWS_MSG = (
+    "Não encontrei notícias recentes de SRAG com esses filtros. "
+    "Você quer ampliar para **30 dias** ou focar em alguma **UF**?"
+)
+
+
+def _news_items(it: Intent) -> list:
+    """Fetch the news items for a routed 'news' intent (UF-focused if given)."""
+    from .news_client import fetch_recent_news_srag
+    from .settings import NEWS_MAX_ITEMS
+    extra = f"Brasil {it.uf}" if it.uf else "Brasil"
+    return fetch_recent_news_srag(limit=NEWS_MAX_ITEMS, days_back=it.days_back or 14, query=extra)
+
+
+def _route(user_text: str, previous_intent: Intent | None) -> Intent:
+    """Classify the text and apply the count/list → nlquery override."""
     it = classify(user_text, previous_intent=previous_intent)
-        # --- Heurística: se o usuário pede número/contagem/listagem, force nlquery ---
+    # --- Heurística: se o usuário pede número/contagem/listagem, force nlquery ---
     tnorm = (user_text or "").lower()
     looks_countish = any(k in tnorm for k in [
         "quantos", "quantas", "número de", "numero de",
@@ -318,23 +363,30 @@ def handle(user_text: str, previous_intent: Intent | None = None) -> tuple[str,
     # se a LLM devolveu report/explain/chitchat por engano, puxe para nlquery
     if looks_countish and it.kind in {"report", "explain", "chitchat", "unknown"}:
         it.kind = "nlquery"
+    return it
+
+
+def handle(user_text: str, previous_intent: Intent | None = None) -> tuple[str, Intent]:
+    """
+    Routes the user text to the right feature and returns Markdown + Intent.
+    """
+    return _dispatch(user_text, _route(user_text, previous_intent))
+
 
+def _dispatch(user_text: str, it: Intent) -> tuple[str, Intent]:
+    """Produce the Markdown reply for an already-routed intent."""
     # 1) Greeting
     if it.kind == "greet":
         return greet_message(), it
 
     # 2) News (with links)
     if it.kind == "news":
-        from .news_client import fetch_recent_news_srag, summarize_news_items
-        extra = f"Brasil {it.uf}" if it.uf else "Brasil"
-        items = fetch_recent_news_srag(limit=8, days_back=it.days_back or 14, query=extra)
+        from .news_client import summarize_news_items
+        from .settings import NEWS_MAX_ITEMS
+        items = _news_items(it)
         if not items:
-            return (
-                "Não encontrei notícias recentes de SRAG com esses filtros. "
-                "Você quer ampliar para **30 dias** ou focar em alguma **UF**?",
-                it,
-            )
-        return summarize_news_items(items, max_items=8), it
+            return _NO_NEWS_MSG, it
+        return summarize_news_items(items, max_items=NEWS_MAX_ITEMS), it
 
     # 3) Explain (glossary)
     if it.kind == "explain":
@@ -408,10 +460,7 @@ def handle(user_text: str, previous_intent: Intent | None = None) -> tuple[str,
     # 9) Chitchat (LLM small talk)
     if it.kind == "chitchat":
         from .llm_router import generate_text
-        sys = ("Você é um assistente PT-BR do projeto SRAG. "
-               "Responda de forma breve e útil. Não invente números epidemiológicos; "
-               "se pedirem dados, sugira usar relatório ou consulta.")
-        txt = generate_text(user_text, sys, temperature=0.3, max_tokens=300)
+        txt = generate_text(user_text, _CHITCHAT_SYSTEM, temperature=0.3, max_tokens=300)
         return txt, it
 
     # 10) Fallback — ask for details
@@ -428,6 +477,48 @@ def handle(user_text: str, previous_intent: Intent | None = None) -> tuple[str,
     return ask, it
 
 
+def _news_stream(it: Intent) -> Iterator[str]:
+    from .news_client import stream_news_summary
+    from .settings import NEWS_MAX_ITEMS
+    items = _news_items(it)
+    if not items:
+        yield _NO_NEWS_MSG
+        return
+    yield from stream_news_summary(items, max_items=NEWS_MAX_ITEMS)
+
+
+def _dataqa_stream(user_text: str) -> Iterator[str]:
+    started = False
+    try:
+        from .tools import stream_data_answer
+        for piece in stream_data_answer(user_text, max_tokens=700):
+            started = True
+            yield piece
+    except Exception as exc:
+        if started:
+            raise  # never glue the error sentence onto a half-written answer
+        yield f"Não consegui responder com base no dicionário de dados agora: `{exc}`"
+
+
+def handle_stream(user_text: str, previous_intent: Intent | None = None) -> tuple[Iterator[str], Intent]:
+    """
+    Like `handle()`, but the reply is an iterator of Markdown chunks.
+
+    Free-text LLM intents (news, chitchat, dataqa) stream tokens as the model
+    emits them; every other intent yields its full reply as a single chunk.
+    """
+    it = _route(user_text, previous_intent)
+    if it.kind == "news":
+        return _news_stream(it), it
+    if it.kind == "chitchat":
+        from .llm_router import stream_text
+        return stream_text(user_text, _CHITCHAT_SYSTEM, temperature=0.3, max_tokens=300), it
+    if it.kind == "dataqa":
+        return _dataqa_stream(user_text), it
+    reply, it = _dispatch(user_text, it)
+    return iter([reply]), it
+
+
 # =============================================================================
 # Manual test
 # =============================================================================
@@ -10,7 +10,7 @@ Environment variables:
 
 from __future__ import annotations
 import os
-from typing import Tuple
+from typing import Iterator, Tuple
 
 try:
     from dotenv import load_dotenv
@@ -53,6 +53,60 @@ def _call_groq(messages, temperature: float = 0.2, max_tokens: int | None = None
     return (resp.choices[0].message.content or "").strip()
 
 
+def _stream_openai(messages, temperature: float = 0.2, max_tokens: int | None = None) -> Iterator[str]:
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    stream = client.chat.completions.create(
+        model=_get_openai_model(),
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _stream_groq(messages, temperature: float = 0.2, max_tokens: int | None = None) -> Iterator[str]:
+    import groq
+    client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+    stream = client.chat.completions.create(
+        model=_get_groq_model(),
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def _acall_openai(messages, temperature: float = 0.2, max_tokens: int | None = None) -> str:
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    resp = await client.chat.completions.create(
+        model=_get_openai_model(),
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    return (resp.choices[0].message.content or "").strip()
+
+
+async def _acall_groq(messages, temperature: float = 0.2, max_tokens: int | None = None) -> str:
+    import groq
+    client = groq.AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    resp = await client.chat.completions.create(
+        model=_get_groq_model(),
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    return (resp.choices[0].message.content or "").strip()
+
+
 def pick_provider() -> Tuple[str, str]:
     """
     Returns ("openai"|"groq", model_name). Prioritizes OpenAI if key is present.
@@ -103,3 +157,80 @@ def generate_text(
             raise RuntimeError(f"Groq failed: {err_gq}") from err_gq
 
     raise RuntimeError("No LLM key configured (set OPENAI_API_KEY or GROQ_API_KEY).")
+
+
+async def agenerate_text(
+    user_content: str,
+    system_content: str,
+    *,
+    temperature: float = 0.2,
+    max_tokens: int | None = None,
+) -> str:
+    """
+    Async twin of `generate_text` (same OpenAI → Groq fallback), so callers can
+    overlap several LLM round-trips with asyncio.gather().
+    """
+    messages = [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content},
+    ]
+
+    if os.getenv("OPENAI_API_KEY"):
+        try:
+            return await _acall_openai(messages, temperature=temperature, max_tokens=max_tokens)
+        except Exception as err_oa:
+            if os.getenv("GROQ_API_KEY"):
+                try:
+                    return await _acall_groq(messages, temperature=temperature, max_tokens=max_tokens)
+                except Exception as err_gq:
+                    raise RuntimeError(
+                        f"Both providers failed. OpenAI error: {err_oa}; Groq error: {err_gq}"
+                    ) from err_gq
+            raise RuntimeError(f"OpenAI failed and no GROQ_API_KEY set: {err_oa}") from err_oa
+
+    if os.getenv("GROQ_API_KEY"):
+        try:
+            return await _acall_groq(messages, temperature=temperature, max_tokens=max_tokens)
+        except Exception as err_gq:
+            raise RuntimeError(f"Groq failed: {err_gq}") from err_gq
+
+    raise RuntimeError("No LLM key configured (set OPENAI_API_KEY or GROQ_API_KEY).")
+
+
+def stream_text(
+    user_content: str,
+    system_content: str,
+    *,
+    temperature: float = 0.2,
+    max_tokens: int | None = None,
+) -> Iterator[str]:
+    """
+    Streaming twin of `generate_text`: yields the reply in chunks as the model
+    produces them. Falls back to Groq only if OpenAI fails before the first
+    chunk (a half-written reply is never restarted on the other provider).
+    """
+    messages = [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content},
+    ]
+    providers = []
+    if os.getenv("OPENAI_API_KEY"):
+        providers.append(("OpenAI", _stream_openai))
+    if os.getenv("GROQ_API_KEY"):
+        providers.append(("Groq", _stream_groq))
+    if not providers:
+        raise RuntimeError("No LLM key configured (set OPENAI_API_KEY or GROQ_API_KEY).")
+
+    errors = []
+    for name, stream in providers:
+        started = False
+        try:
+            for piece in stream(messages, temperature=temperature, max_tokens=max_tokens):
+                started = True
+                yield piece
+            return
+        except Exception as err:
+            if started:
+                raise
+            errors.append(f"{name} error: {err}")
+    raise RuntimeError("All providers failed. " + "; ".join(errors))
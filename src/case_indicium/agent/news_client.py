@@ -2,14 +2,20 @@
 """
 Minimal SRAG news fetcher + summarizer using tavily-python (Brazil-focused).
 
-This module provides two functions:
+This module provides five functions:
   1) fetch_recent_news_srag(...)  -> List[NewsItem]
-  2) summarize_news_items(...)    -> Markdown (PT-BR) with inline citations and sources
+  2) rank_news(...)               -> top-N items by recency + keyword hits
+  3) rank_cached_news(...)        -> same ranking, in DuckDB, over the on-disk cache
+  4) summarize_news_items(...)    -> Markdown (PT-BR) with inline citations and sources
+  5) stream_news_summary(...)     -> same Markdown, yielded in chunks for the chat UI
 
 Design goals
 ------------
 - Keep it simple and predictable.
 - Use Tavily's official SDK for search.
+- Cache results on disk (NEWS_CACHE_PATH, NEWS_TTL_HOURS).
+- Rank with NumPy: strings are reduced once to (timestamp, keyword hits) arrays,
+  then scored as NEWS_RANK_REC_W * recency_norm + NEWS_RANK_KW_W * kw_hits.
 - Summaries are generated in Brazilian Portuguese. If the LLM call fails,
   a deterministic bullet list fallback is returned.
 
@@ -21,13 +27,39 @@ Environment variables
 
 from __future__ import annotations
 
+import json
 import os
+import re
+import time
 from datetime import datetime, timezone
-from typing import List, Optional, Sequence
+from itertools import islice
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
 
+import numpy as np
 from tavily import TavilyClient
 
-from .schemas import NewsItem
+from . import queries as Q
+from .schemas import NEWS_ADAPTER, NewsItem
+from .settings import (
+    NEWS_CACHE_PATH,
+    NEWS_KEYWORDS,
+    NEWS_MAX_ITEMS,
+    NEWS_MIN_KW_HITS,
+    NEWS_RANK_KW_W,
+    NEWS_RANK_REC_W,
+    NEWS_TTL_HOURS,
+)
+
+if TYPE_CHECKING:
+    from .sql_client import SQLClient
+
+# Longest keywords first so overlapping phrases count once.
+_KEYWORDS_PATTERN = (
+    "|".join(re.escape(k) for k in sorted(NEWS_KEYWORDS, key=len, reverse=True)) or r"(?!)"
+)
+_KEYWORDS_RE = re.compile(_KEYWORDS_PATTERN, re.IGNORECASE)
+# Tavily accepts at most 20 results per search.
+_TAVILY_MAX_RESULTS = 20
 
 
 # ---------------------------------------------------------------------------
@@ -49,12 +81,118 @@ def _now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _cache_key(query: str, days_back: int, limit: int) -> str:
+    return f"{query}|{days_back}|{limit}"
+
+
+def _cache_load() -> dict:
+    try:
+        data = json.loads(NEWS_CACHE_PATH.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _cache_get(key: str) -> Optional[List[NewsItem]]:
+    """Return cached items for `key` if younger than NEWS_TTL_HOURS."""
+    entry = _cache_load().get(key)
+    if not isinstance(entry, dict):
+        return None
+    if time.time() - float(entry.get("fetched_at", 0)) > NEWS_TTL_HOURS * 3600:
+        return None
+    try:
+        return NEWS_ADAPTER.validate_python(entry.get("items") or [])
+    except ValueError:
+        return None
+
+
+def _cache_put(key: str, items: List[NewsItem]) -> None:
+    """Persist items (including published_ts) under `key`; best effort."""
+    data = _cache_load()
+    data[key] = {"fetched_at": time.time(), "items": [it.model_dump() for it in items]}
+    try:
+        NEWS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        NEWS_CACHE_PATH.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Rank
+# ---------------------------------------------------------------------------
+
+def rank_news(items: Sequence[NewsItem], limit: int) -> List[NewsItem]:
+    """
+    Keep the `limit` best items, best first.
+
+    score = NEWS_RANK_REC_W * (ts - ts.min()) / ptp(ts) + NEWS_RANK_KW_W * kw_hits
+
+    Items with fewer than NEWS_MIN_KW_HITS keyword hits are dropped.
+    Unparseable dates count as the oldest item in the batch.
+    """
+    n = len(items)
+    if n == 0 or limit <= 0:
+        return []
+
+    ts = np.fromiter((it.published_ts for it in items), dtype=np.int64, count=n)
+    hits = np.fromiter(
+        (len(_KEYWORDS_RE.findall(f"{it.title} {it.summary or ''}")) for it in items),
+        dtype=np.int32,
+        count=n,
+    )
+
+    keep = np.flatnonzero(hits >= NEWS_MIN_KW_HITS)
+    if keep.size == 0:
+        return []
+    ts, hits = ts[keep], hits[keep]
+    dated = ts > 0
+    if dated.any():
+        ts[~dated] = ts[dated].min()
+
+    span = max(1, int(np.ptp(ts)))
+    scores = NEWS_RANK_REC_W * (ts - ts.min()) / span + NEWS_RANK_KW_W * hits
+
+    # Partial selection of the top-k, then order only those k.
+    k = min(int(limit), scores.size)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [items[i] for i in keep[top]]
+
+
+def rank_cached_news(sql: "SQLClient", limit: int = NEWS_MAX_ITEMS) -> List[NewsItem]:
+    """
+    Rank every fresh item in NEWS_CACHE_PATH inside DuckDB (Q.SQL_NEWS_RANKED).
+
+    Same score as `rank_news`, applied across all cached queries (deduplicated
+    by URL). Entries older than NEWS_TTL_HOURS are ignored. Used when the live
+    provider is unavailable; returns [] if there is no usable cache.
+    """
+    if not NEWS_CACHE_PATH.exists():
+        return []
+    params = {
+        "path": str(NEWS_CACHE_PATH),
+        "min_fetched_at": time.time() - NEWS_TTL_HOURS * 3600,
+        "kw_re": f"(?i){_KEYWORDS_PATTERN}",
+        "min_kw_hits": NEWS_MIN_KW_HITS,
+        "rec_w": NEWS_RANK_REC_W,
+        "kw_w": NEWS_RANK_KW_W,
+        "limit": max(1, min(int(limit), NEWS_MAX_ITEMS)),
+    }
+    try:
+        df = sql.df(Q.SQL_NEWS_RANKED, params)
+    except Exception:
+        return []
+    df = df.drop(columns="score").astype(object)
+    rows = df.where(df.notna(), None).to_dict("records")
+    return NEWS_ADAPTER.validate_python(rows)
+
+
 # ---------------------------------------------------------------------------
 # Fetch
 # ---------------------------------------------------------------------------
 
 def fetch_recent_news_srag(
-    limit: int = 8,
+    limit: int = NEWS_MAX_ITEMS,
     query: Optional[str] = None,
     *,
     days_back: int = 7,
@@ -62,22 +200,33 @@ def fetch_recent_news_srag(
     """
     Fetch recent SRAG-related articles via Tavily (Brazil-focused).
 
+    Over-fetches (up to 2x `limit`) and keeps the best items via `rank_news`.
+    Results are cached in NEWS_CACHE_PATH for NEWS_TTL_HOURS per (query, window, limit).
+
     Args:
-        limit: Maximum number of items to return (default 8).
+        limit: Maximum number of items to return (default and hard cap: NEWS_MAX_ITEMS).
         query: Optional extra filter appended to the base query.
         days_back: Window mapped to Tavily's time_range ('day'|'week'|'month'|'year').
 
     Returns:
         List[NewsItem] (possibly empty).
     """
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise RuntimeError("TAVILY_API_KEY is not set.")
+    # Enforce the cap here so downstream code never carries a long tail.
+    limit = max(1, min(int(limit), NEWS_MAX_ITEMS))
 
     base = "Novidades sobre SRAG no Brasil"
     if query:
         base = f"{base} {query}"
 
+    key = _cache_key(base, days_back, limit)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise RuntimeError("TAVILY_API_KEY is not set.")
+
     client = TavilyClient(api_key)
     resp = client.search(
         query=base,
@@ -85,11 +234,11 @@ def fetch_recent_news_srag(
         country="brazil",
         topic="general",
         search_depth="basic",
-        max_results=max(1, int(limit)),
+        max_results=min(_TAVILY_MAX_RESULTS, 2 * limit),
         include_answer=False,
     )
 
-    items: List[NewsItem] = []
+    rows: List[dict] = []
     for r in (resp or {}).get("results", []):
         title = (r.get("title") or "").strip() or "(sem título)"
         url = (r.get("url") or "").strip()
@@ -110,27 +259,82 @@ def fetch_recent_news_srag(
         )
         summary = (r.get("content") or r.get("snippet") or "").strip() or None
 
-        items.append(
-            NewsItem(
-                title=title,
-                url=url,
-                source=source,
-                published_at=str(published),
-                summary=summary,
-            )
+        rows.append(
+            {
+                "title": title,
+                "url": url,
+                "source": source,
+                "published_at": str(published),
+                "summary": summary,
+            }
         )
 
-    return items[:limit]
+    items = rank_news(NEWS_ADAPTER.validate_python(rows), limit)
+    _cache_put(key, items)
+    return items
 
 
 # ---------------------------------------------------------------------------
 # Summarize
 # ---------------------------------------------------------------------------
 
+def _summary_prompts(sel: Sequence[NewsItem], audience: str) -> tuple[str, str]:
+    """Build the (system, user) prompt pair for summarizing `sel`."""
+    # Build compact payload for the model
+    rows = []
+    for i, it in enumerate(sel, 1):
+        rows.append(
+            {
+                "id": i,
+                "title": it.title,
+                "source": it.source,
+                "published_at": it.published_at,
+                "summary": (it.summary or "")[:400],
+            }
+        )
+
+    system_pt = (
+        "Você é um analista epidemiológico. Escreva em português do Brasil, claro e objetivo. "
+        "Resuma as notícias sem inventar informações. "
+        "Use citações numéricas entre colchetes [n] que correspondem ao id do item."
+    )
+    user_pt = (
+        "Resuma as principais novidades de SRAG para {audience}. "
+        "Use no máximo 6 bullets e, se fizer sentido, uma frase inicial de contexto. "
+        "Mantenha números e datas existentes. "
+        "Itens (cada um tem um id para citação):\n"
+        "{rows}\n\n"
+        "Regras:\n"
+        "- Não invente dados que não estejam nos itens.\n"
+        "- Sempre use citações [n] para cada afirmação derivada de um item.\n"
+        "- Foque em implicações para vigilância/assistência (tendências, alertas, campanhas, leitos etc.)."
+    ).format(audience=audience, rows=rows)
+    return system_pt, user_pt
+
+
+def _fallback_summary(sel: Sequence[NewsItem]) -> str:
+    """Deterministic summary (titles only) used when the LLM is unavailable."""
+    bullets = "\n".join(f"- [{i}] {it.title}" for i, it in enumerate(sel, 1))
+    return (
+        "### Principais pontos (resumo simples)\n"
+        f"{bullets}\n\n"
+        "_Obs.: resumo simplificado porque o serviço de LLM não estava disponível._"
+    )
+
+
+def _sources_md(sel: Sequence[NewsItem]) -> str:
+    """The trailing "Fontes" section mapping [n] -> markdown link."""
+    fontes_lines = []
+    for i, it in enumerate(sel, 1):
+        date_str = (it.published_at or "")[:10]
+        fontes_lines.append(f"[{i}] {it.title} — *{it.source}, {date_str}*. {it.url}")
+    return "\n\n**Fontes**\n" + "\n".join(f"- {line}" for line in fontes_lines)
+
+
 def summarize_news_items(
     items: Sequence[NewsItem],
     *,
-    max_items: int = 8,
+    max_items: int = NEWS_MAX_ITEMS,
     audience: str = "gestores de saúde",
     temperature: float = 0.2,
     max_tokens: int = 900,
@@ -156,39 +360,11 @@ def summarize_news_items(
     Returns:
         Markdown string.
     """
-    sel = list(items)[:max_items]
+    sel = list(islice(items, max_items))
     if not sel:
         return "Não encontrei notícias relevantes no período selecionado."
 
-    # Build compact payload for the model
-    rows = []
-    for i, it in enumerate(sel, 1):
-        rows.append(
-            {
-                "id": i,
-                "title": it.title,
-                "source": it.source,
-                "published_at": it.published_at,
-                "summary": (it.summary or "")[:400],
-            }
-        )
-
-    system_pt = (
-        "Você é um analista epidemiológico. Escreva em português do Brasil, claro e objetivo. "
-        "Resuma as notícias sem inventar informações. "
-        "Use citações numéricas entre colchetes [n] que correspondem ao id do item."
-    )
-    user_pt = (
-        "Resuma as principais novidades de SRAG para {audience}. "
-        "Use no máximo 6 bullets e, se fizer sentido, uma frase inicial de contexto. "
-        "Mantenha números e datas existentes. "
-        "Itens (cada um tem um id para citação):\n"
-        "{rows}\n\n"
-        "Regras:\n"
-        "- Não invente dados que não estejam nos itens.\n"
-        "- Sempre use citações [n] para cada afirmação derivada de um item.\n"
-        "- Foque em implicações para vigilância/assistência (tendências, alertas, campanhas, leitos etc.)."
-    ).format(audience=audience, rows=rows)
+    system_pt, user_pt = _summary_prompts(sel, audience)
 
     # Try LLM; if it fails, return a deterministic fallback
     try:
@@ -201,24 +377,60 @@ def summarize_news_items(
             max_tokens=max_tokens,
         ).strip()
     except Exception:
-        # Fallback: simple bullet list using titles only
-        bullets = "\n".join(f"- [{i}] {it.title}" for i, it in enumerate(sel, 1))
-        body = (
-            "### Principais pontos (resumo simples)\n"
-            f"{bullets}\n\n"
-            "_Obs.: resumo simplificado porque o serviço de LLM não estava disponível._"
-        )
+        body = _fallback_summary(sel)
 
-    # Append sources with links
-    fontes_lines = []
-    for i, it in enumerate(sel, 1):
-        date_str = (it.published_at or "")[:10]
-        fontes_lines.append(f"[{i}] {it.title} — *{it.source}, {date_str}*. {it.url}")
+    return body + _sources_md(sel)
 
-    return body + "\n\n**Fontes**\n" + "\n".join(f"- {line}" for line in fontes_lines)
 
+def stream_news_summary(
+    items: Sequence[NewsItem],
+    *,
+    max_items: int = NEWS_MAX_ITEMS,
+    audience: str = "gestores de saúde",
+    temperature: float = 0.2,
+    max_tokens: int = 900,
+) -> Iterator[str]:
+    """
+    Streaming twin of `summarize_news_items`: yields the summary in chunks as
+    the model writes it, then the "Fontes" section.
 
-__all__ = ["fetch_recent_news_srag", "summarize_news_items"]
+    The deterministic fallback is used only if the LLM fails before the first
+    chunk; a failure mid-answer is re-raised instead of appending the fallback
+    to a half-written summary.
+    """
+    sel = list(islice(items, max_items))
+    if not sel:
+        yield "Não encontrei notícias relevantes no período selecionado."
+        return
+
+    system_pt, user_pt = _summary_prompts(sel, audience)
+    started = False
+    try:
+        from .llm_router import stream_text  # local import to avoid circular deps
+
+        for piece in stream_text(
+            user_pt, system_pt, temperature=temperature, max_tokens=max_tokens
+        ):
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            yield piece
+    except Exception:
+        if started:
+            raise
+        yield _fallback_summary(sel)
+    yield _sources_md(sel)
+
+
+__all__ = [
+    "fetch_recent_news_srag",
+    "rank_news",
+    "rank_cached_news",
+    "summarize_news_items",
+    "stream_news_summary",
+]
 
 
 # ---------------------------------------------------------------------------
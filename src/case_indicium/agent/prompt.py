@@ -12,9 +12,16 @@ Notes:
 """
 
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 import json
 
+from .schemas import SeriesColumnar
+
+try:  # optional: C-level serializer, also handles numpy scalars/arrays and dates
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 PROMPT_VERSION = "v1"
 SYSTEM_PROMPT_PT = """
 Você é um analista epidemiológico escrevendo relatórios sobre Síndrome Respiratória Aguda Grave (SRAG).
@@ -73,14 +80,40 @@ Instruções de métricas e limitações (NÃO invente números; sempre cite jan
 """
 
 
+def _json_default(value: Any) -> Any:
+    """stdlib fallback for non-JSON types, mirroring orjson (ISO dates, str otherwise)."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize the payload once (orjson when available, stdlib json otherwise).
+
+    Both paths emit the same compact UTF-8 text, so the prompt (and the sha256
+    completion-cache key derived from it) does not depend on orjson being installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def _series_payload(series: Union[SeriesColumnar, List[Dict[str, Any]]], cap: int) -> Any:
+    """Columnar series go out as {"x": [...], "y": [...]}; row lists are passed through."""
+    if isinstance(series, SeriesColumnar):
+        return series.head(cap).to_dict()
+    return series[:cap]
+
+
 def build_user_prompt(
     *,
     scope: str,
     uf: Optional[str],
     as_of_day: Optional[str],
     kpis: Dict[str, Any],
-    daily_series_30d: List[Dict[str, Any]],
-    monthly_series_12m: List[Dict[str, Any]],
+    daily_series_30d: Union[SeriesColumnar, List[Dict[str, Any]]],
+    monthly_series_12m: Union[SeriesColumnar, List[Dict[str, Any]]],
     news: List[Dict[str, Any]],
     notes: Optional[List[str]] = None,
 ) -> str:
@@ -90,56 +123,16 @@ def build_user_prompt(
         "uf": uf,
         "as_of_day": as_of_day,
         "kpis": kpis,
-        "daily_series_30d": daily_series_30d[:180],   # cap defensivo
-        "monthly_series_12m": monthly_series_12m[:60],
+        "daily_series_30d": _series_payload(daily_series_30d, 180),   # cap defensivo
+        "monthly_series_12m": _series_payload(monthly_series_12m, 60),
         "news": [{k: it.get(k) for k in ("title","url","source","published_at","summary")} for it in news[:10]],
         "notes": (notes or [])[:10],
         "guidelines": "Siga fielmente as instruções das métricas e limitações fornecidas."
     }
-    payload_json = json.dumps(payload, ensure_ascii=False)
+    payload_json = _dumps(payload)
     return (
         "Dados estruturados do relatório (não invente números; use apenas o payload abaixo):\n"
         f"```json\n{payload_json}\n```\n\n"
         "Siga estritamente as diretrizes abaixo e gere o relatório com a estrutura pedida.\n"
         f"{AGENT_METRIC_GUIDELINES_PT}"
     )
-
-    def lines_from_list(label: str, items: List[Dict[str, Any]]) -> str:
-        if not items:
-            return f'"{label}": []'
-        # Brief, single-line per item (avoid multi-line explosions)
-        rendered = []
-        for it in items[:10]:
-            flat = {k: it.get(k) for k in ("title", "url", "source", "published_at", "summary")}
-            rendered.append(str(flat))
-        return f'"{label}": [\n    ' + ",\n    ".join(rendered) + "\n  ]"
-
-    def lines_from_points(label: str, pts: List[Dict[str, Any]]) -> str:
-        if not pts:
-            return f'"{label}": []'
-        rendered = [f'{{"x": "{p.get("x")}", "y": {p.get("y")}}}' for p in pts]
-        return f'"{label}": [\n    ' + ",\n    ".join(rendered) + "\n  ]"
-
-    notes_block = ""
-    if notes:
-        notes_block = '"notes": [\n    ' + ",\n    ".join([f'"{n}"' for n in notes[:10]]) + "\n  ],\n  "
-
-    payload = (
-        "{\n"
-        f'  {scope_str},\n'
-        f'  {as_of_str},\n'
-        f'  "kpis": {str(kpis)},\n'
-        f'  {lines_from_points("daily_series_30d", daily_series_30d)},\n'
-        f'  {lines_from_points("monthly_series_12m", monthly_series_12m)},\n'
-        f'  {lines_from_list("news", news)},\n'
-        f'  {notes_block}"guidelines": "Siga fielmente as instruções das métricas e limitações fornecidas."\n'
-        "}"
-    )
-
-    user_text = (
-        "Dados estruturados do relatório (não invente números; use apenas o payload abaixo):\n"
-        f"{payload}\n\n"
-        "Siga estritamente as diretrizes abaixo e gere o relatório com a estrutura pedida.\n"
-        f"{AGENT_METRIC_GUIDELINES_PT}"
-    )
-    return user_text
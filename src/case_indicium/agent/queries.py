@@ -7,6 +7,9 @@ Design goals
 - Be robust to missing recent data (COALESCE, guarded divisions).
 - Never average UF-level percentages for national numbers (always re-aggregate numerators/denominators).
 - Keep UF-scoped variants parameterized via $uf.
+- Window queries read the pre-filtered gold.fct_daily_uf_30d / gold.fct_monthly_uf_12m
+  (built with the same as_of anchor); their as_of filters are kept, so each
+  query still returns the same rows against the full fact tables.
 """
 
 
@@ -30,11 +33,11 @@ SELECT
 SQL_GROWTH_7D_BR = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 ),
 d AS (
   SELECT day, SUM(cases) AS cases
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
   GROUP BY day
 ),
 w AS (
@@ -63,11 +66,11 @@ FROM w;
 SQL_GROWTH_7D_UF = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 ),
 d AS (
   SELECT day, SUM(cases) AS cases
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
   WHERE uf = $uf
   GROUP BY day
 ),
@@ -97,7 +100,7 @@ FROM w;
 SQL_KPIS_30D_BR = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 ),
 agg AS (
   SELECT
@@ -106,7 +109,7 @@ agg AS (
     COALESCE(SUM(cases), 0)             AS cases_30d,
     COALESCE(SUM(icu_cases), 0)         AS icu_cases_30d,
     COALESCE(SUM(vaccinated_cases), 0)  AS vaccinated_cases_30d
-  FROM gold.fct_daily_uf t
+  FROM gold.fct_daily_uf_30d t
   CROSS JOIN as_of a
   WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
 )
@@ -135,7 +138,7 @@ FROM agg;
 SQL_KPIS_30D_UF = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 ),
 agg AS (
   SELECT
@@ -144,7 +147,7 @@ agg AS (
     COALESCE(SUM(cases), 0)             AS cases_30d,
     COALESCE(SUM(icu_cases), 0)         AS icu_cases_30d,
     COALESCE(SUM(vaccinated_cases), 0)  AS vaccinated_cases_30d
-  FROM gold.fct_daily_uf t
+  FROM gold.fct_daily_uf_30d t
   CROSS JOIN as_of a
   WHERE t.uf = $uf
     AND t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
@@ -167,6 +170,57 @@ SELECT
 FROM agg;
 """
 
+# -----------------------------
+# KPI bundle (growth 7d + KPIs 30d in one scan) - BR / UF
+# -----------------------------
+# The 14-day growth windows sit inside the 30-day window, so one pass over
+# gold.fct_daily_uf_30d yields every KPI.
+
+_SQL_KPIS_BUNDLE = """
+WITH as_of AS (
+  SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
+  FROM gold.fct_daily_uf_30d
+),
+agg AS (
+  SELECT
+    COALESCE(SUM(CASE WHEN t.day > a.d - INTERVAL 7 DAY THEN t.cases END), 0) AS cases_7d,
+    COALESCE(SUM(CASE WHEN t.day > a.d - INTERVAL 14 DAY
+                      AND t.day <= a.d - INTERVAL 7 DAY THEN t.cases END), 0) AS cases_prev_7d,
+    COALESCE(SUM(closed_cases_30d), 0)  AS closed_cases_30d,
+    COALESCE(SUM(deaths_30d), 0)        AS deaths_30d,
+    COALESCE(SUM(cases), 0)             AS cases_30d,
+    COALESCE(SUM(icu_cases), 0)         AS icu_cases_30d,
+    COALESCE(SUM(vaccinated_cases), 0)  AS vaccinated_cases_30d
+  FROM gold.fct_daily_uf_30d t
+  CROSS JOIN as_of a
+  WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d{uf_filter}
+)
+SELECT
+  agg.cases_7d,
+  agg.cases_prev_7d,
+  CASE WHEN agg.cases_prev_7d > 0
+       THEN 100.0 * (agg.cases_7d - agg.cases_prev_7d) / agg.cases_prev_7d
+       ELSE NULL END AS growth_7d_pct,
+  agg.cases_30d,
+  agg.icu_cases_30d,
+  agg.vaccinated_cases_30d,
+  agg.closed_cases_30d,
+  agg.deaths_30d,
+  CASE WHEN agg.closed_cases_30d > 0
+       THEN 100.0 * agg.deaths_30d / agg.closed_cases_30d
+       ELSE NULL END AS cfr_closed_30d_pct,
+  CASE WHEN agg.cases_30d > 0
+       THEN 100.0 * agg.icu_cases_30d / agg.cases_30d
+       ELSE NULL END AS icu_rate_30d_pct,
+  CASE WHEN agg.cases_30d > 0
+       THEN 100.0 * agg.vaccinated_cases_30d / agg.cases_30d
+       ELSE NULL END AS vaccinated_rate_30d_pct
+FROM agg;
+"""
+
+SQL_KPIS_BUNDLE_BR = _SQL_KPIS_BUNDLE.format(uf_filter="")
+SQL_KPIS_BUNDLE_UF = _SQL_KPIS_BUNDLE.format(uf_filter="\n    AND t.uf = $uf")
+
 # -----------------------------
 # Daily series (last 30d) - BR
 # -----------------------------
@@ -174,10 +228,10 @@ FROM agg;
 SQL_DAILY_30D_BR = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 )
 SELECT t.day, SUM(t.cases) AS cases
-FROM gold.fct_daily_uf t
+FROM gold.fct_daily_uf_30d t
 CROSS JOIN as_of a
 WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
 GROUP BY t.day
@@ -191,10 +245,10 @@ ORDER BY t.day;
 SQL_DAILY_30D_UF = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
-  FROM gold.fct_daily_uf
+  FROM gold.fct_daily_uf_30d
 )
 SELECT t.day, SUM(t.cases) AS cases
-FROM gold.fct_daily_uf t
+FROM gold.fct_daily_uf_30d t
 CROSS JOIN as_of a
 WHERE t.uf = $uf
   AND t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
@@ -209,10 +263,10 @@ ORDER BY t.day;
 SQL_MONTHLY_12M_BR = """
 WITH as_of AS (
   SELECT COALESCE(DATE_TRUNC('month', MAX(month)), DATE_TRUNC('month', CURRENT_DATE)) AS m
-  FROM gold.fct_monthly_uf
+  FROM gold.fct_monthly_uf_12m
 )
 SELECT t.month, SUM(t.cases) AS cases
-FROM gold.fct_monthly_uf t
+FROM gold.fct_monthly_uf_12m t
 CROSS JOIN as_of a
 WHERE t.month >= a.m - INTERVAL 11 MONTH
   AND t.month <= a.m
@@ -227,10 +281,10 @@ ORDER BY t.month;
 SQL_MONTHLY_12M_UF = """
 WITH as_of AS (
   SELECT COALESCE(DATE_TRUNC('month', MAX(month)), DATE_TRUNC('month', CURRENT_DATE)) AS m
-  FROM gold.fct_monthly_uf
+  FROM gold.fct_monthly_uf_12m
 )
 SELECT t.month, SUM(t.cases) AS cases
-FROM gold.fct_monthly_uf t
+FROM gold.fct_monthly_uf_12m t
 CROSS JOIN as_of a
 WHERE t.uf = $uf
   AND t.month >= a.m - INTERVAL 11 MONTH
@@ -239,22 +293,61 @@ GROUP BY t.month
 ORDER BY t.month;
 """
 
+# -----------------------------
+# Series bundle (daily 30d + monthly 12m, tagged) - BR / UF
+# -----------------------------
+
+_SQL_SERIES_BUNDLE = """
+WITH last_day AS (
+  SELECT COALESCE(MAX(day), CURRENT_DATE) AS d
+  FROM gold.fct_daily_uf_30d
+),
+last_month AS (
+  SELECT COALESCE(DATE_TRUNC('month', MAX(month)), DATE_TRUNC('month', CURRENT_DATE)) AS m
+  FROM gold.fct_monthly_uf_12m
+)
+SELECT 'daily' AS series, t.day AS x, CAST(SUM(t.cases) AS DOUBLE) AS y
+FROM gold.fct_daily_uf_30d t
+CROSS JOIN last_day a
+WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d{uf_filter}
+GROUP BY t.day
+UNION ALL
+SELECT 'monthly' AS series, CAST(t.month AS DATE) AS x, CAST(SUM(t.cases) AS DOUBLE) AS y
+FROM gold.fct_monthly_uf_12m t
+CROSS JOIN last_month a
+WHERE t.month >= a.m - INTERVAL 11 MONTH
+  AND t.month <= a.m{uf_filter}
+GROUP BY t.month
+ORDER BY series, x;
+"""
+
+SQL_SERIES_BUNDLE_BR = _SQL_SERIES_BUNDLE.format(uf_filter="")
+SQL_SERIES_BUNDLE_UF = _SQL_SERIES_BUNDLE.format(uf_filter="\n  AND t.uf = $uf")
+
 # -----------------------------
 # Rankings auxiliares (opcional)
 # -----------------------------
 
 SQL_TOP_UF_CASES_30D = """
 WITH as_of AS (
-  SELECT COALESCE(MAX(day), CURRENT_DATE) AS d FROM gold.fct_daily_uf
+  SELECT COALESCE(MAX(day), CURRENT_DATE) AS d FROM gold.fct_daily_uf_30d
 )
 SELECT uf, SUM(cases) AS cases_30d
-FROM gold.fct_daily_uf t
+FROM gold.fct_daily_uf_30d t
 CROSS JOIN as_of a
 WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
 GROUP BY uf
 ORDER BY cases_30d DESC;
 """
 
+# UFs present in gold (sidebar options / UF validation)
+SQL_UF_LIST = """
+SELECT DISTINCT uf
+FROM gold.fct_daily_uf
+WHERE uf IS NOT NULL
+ORDER BY uf;
+"""
+
 SQL_CFR_UF_90D = """
 WITH as_of AS (
   SELECT COALESCE(MAX(day), CURRENT_DATE) AS d FROM gold.fct_daily_uf
@@ -275,3 +368,54 @@ SELECT uf,
 FROM agg
 ORDER BY cfr_closed_30d_pct DESC NULLS LAST;
 """
+
+# -----------------------------
+# News (ranked from the on-disk news cache)
+# -----------------------------
+
+# $path: NEWS_CACHE_PATH; $min_fetched_at: epoch seconds (TTL cut-off);
+# $kw_re: keyword regex; the rest mirror the NEWS_* ranking settings.
+SQL_NEWS_RANKED = """
+WITH entries AS (
+  SELECT unnest(json_extract(content::JSON, '$.*')) AS e
+  FROM read_text($path)
+),
+items AS (
+  SELECT unnest(
+           from_json(
+             json_extract(e, '$.items'),
+             '[{"title":"VARCHAR","url":"VARCHAR","source":"VARCHAR","published_at":"VARCHAR","summary":"VARCHAR","published_ts":"BIGINT"}]'
+           ),
+           recursive := true
+         )
+  FROM entries
+  WHERE CAST(json_extract(e, '$.fetched_at') AS DOUBLE) >= $min_fetched_at
+),
+dedup AS (
+  SELECT * FROM items
+  WHERE url IS NOT NULL AND url <> ''
+  QUALIFY row_number() OVER (PARTITION BY url ORDER BY published_ts DESC) = 1
+),
+hits AS (
+  SELECT *,
+         len(regexp_extract_all(title || ' ' || COALESCE(summary, ''), $kw_re)) AS kw_hits
+  FROM dedup
+),
+dated AS (
+  -- undated items count as the oldest dated item
+  SELECT *,
+         COALESCE(
+           CASE WHEN published_ts > 0 THEN published_ts END,
+           MIN(published_ts) FILTER (WHERE published_ts > 0) OVER (),
+           0
+         ) AS ts
+  FROM hits
+  WHERE kw_hits >= $min_kw_hits
+)
+SELECT title, url, source, published_at, summary, published_ts,
+       $rec_w * (ts - MIN(ts) OVER ()) / GREATEST(1, MAX(ts) OVER () - MIN(ts) OVER ())
+         + $kw_w * kw_hits AS score
+FROM dated
+ORDER BY score DESC, published_ts DESC
+LIMIT $limit;
+"""
@@ -15,10 +15,30 @@ Compatibility note:
   and types annotated more explicitly where helpful.
 """
 
-from datetime import date
-from typing import List, Optional
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, model_validator
+
+# Value objects are immutable; unknown keys from SQL rows / providers are dropped.
+_VALUE_CONFIG = ConfigDict(frozen=True, extra="ignore")
+
+
+def _to_epoch(value: str) -> int:
+    """ISO-8601 (or RFC-2822, as some feeds use) → epoch seconds; naive = UTC, 0 = unknown."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
 
 
 class KPIs30d(BaseModel):
@@ -34,6 +54,8 @@ class KPIs30d(BaseModel):
         vaccinated_rate_30d_pct: Share of notified cases with vaccination recorded (percent).
     """
 
+    model_config = _VALUE_CONFIG
+
     cases_7d: int = Field(..., description="Cases in the most recent 7-day window.")
     cases_prev_7d: int = Field(..., description="Cases in the previous 7-day window.")
     growth_7d_pct: Optional[float] = Field(
@@ -60,6 +82,8 @@ class SeriesPoint(BaseModel):
         y: Numeric value at that date.
     """
 
+    model_config = _VALUE_CONFIG
+
     x: date = Field(..., description="Date for this observation.")
     y: float = Field(..., description="Value at date x.")
 
@@ -79,6 +103,43 @@ class Series(BaseModel):
     )
 
 
+@dataclass(slots=True)
+class SeriesColumnar:
+    """
+    Column-oriented time series used between DuckDB and the prompt/report stage.
+
+    Attributes:
+        xs: ISO dates (YYYY-MM-DD) as a numpy string array.
+        ys: float64 values, same length as `xs`, without NaN.
+
+    Row dicts / SeriesPoint objects are only materialized on demand
+    (`to_points`), so the hot path never allocates one object per point.
+    """
+
+    xs: np.ndarray
+    ys: np.ndarray
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SeriesColumnar":
+        """Build from the `{"x": [...], "y": [...]}` shape produced by `to_dict`."""
+        return cls(np.asarray(data.get("x") or [], dtype=str),
+                   np.asarray(data.get("y") or [], dtype=np.float64))
+
+    def __len__(self) -> int:
+        return int(self.xs.size)
+
+    def head(self, n: int) -> "SeriesColumnar":
+        return SeriesColumnar(self.xs[:n], self.ys[:n])
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """JSON-ready columnar form: {"x": [...], "y": [...]}."""
+        return {"x": self.xs.tolist(), "y": self.ys.tolist()}
+
+    def to_points(self) -> List[Dict[str, Any]]:
+        """Row form [{"x": ..., "y": ...}] (validated by Series(points=...))."""
+        return [{"x": x, "y": y} for x, y in zip(self.xs.tolist(), self.ys.tolist())]
+
+
 class NewsItem(BaseModel):
     """
     Minimal news item used by the agent's news feed.
@@ -89,13 +150,31 @@ class NewsItem(BaseModel):
         source: Publisher/source name.
         published_at: ISO-8601 timestamp string.
         summary: Optional short summary/abstract.
+        published_ts: `published_at` as epoch seconds (0 when unparseable).
+            Parsed once on ingestion; payloads that already carry it (e.g. the
+            on-disk news cache) skip parsing.
     """
 
+    model_config = _VALUE_CONFIG
+
     title: str = Field(..., description="Article title/headline.")
     url: str = Field(..., description="Canonical URL for the article.")
     source: str = Field(..., description="Publisher/source name.")
     published_at: str = Field(..., description="ISO-8601 datetime string.")
     summary: Optional[str] = Field(None, description="Optional short abstract.")
+    published_ts: int = Field(0, description="published_at as epoch seconds (0 = unknown).")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _fill_published_ts(cls, data: Any) -> Any:
+        if isinstance(data, dict) and "published_ts" not in data and data.get("published_at"):
+            data = {**data, "published_ts": _to_epoch(str(data["published_at"]))}
+        return data
+
+
+# Validate whole lists in one call (pydantic-core fast path) instead of
+# instantiating models item by item.
+NEWS_ADAPTER: TypeAdapter[List[NewsItem]] = TypeAdapter(List[NewsItem])
 
 
 class ReportInput(BaseModel):
@@ -29,6 +29,10 @@ Environment variables (selected):
   - NEWS_KEYWORDS             (JSON list or comma-separated)
   - NEWS_RSS_URLS             (JSON list or comma-separated)
 
+  # Report cache (KPI/series bundles + LLM completions)
+  - REPORT_CACHE              (default: "1")   # 0 = always recompute
+  - REPORT_CACHE_DIR          (default: "data/cache", relative to the repo root)
+
   # Tavily (optional)
   - TAVILY_API_KEY
   - TAVILY_SEARCH_DEPTH       (default: "basic")   # "basic" | "advanced"
@@ -47,6 +51,21 @@ from typing import Iterable, List, Sequence, Tuple
 # Small helpers
 # -------------------------
 
+def repo_path(p: str | os.PathLike) -> Path:
+    """
+    Anchor a relative path at the repo root (the nearest ancestor of the CWD
+    holding pyproject.toml), so data paths do not depend on where the app or
+    CLI is launched from. Absolute paths are returned unchanged.
+    """
+    path = Path(p)
+    if path.is_absolute():
+        return path
+    cur = Path.cwd()
+    while cur != cur.parent and not (cur / "pyproject.toml").exists():
+        cur = cur.parent
+    return cur / path
+
+
 def _json_env(name: str, default_list: Iterable[str]) -> Tuple[str, ...]:
     """
     Read a JSON list from an environment variable; if missing or invalid,
@@ -140,6 +159,14 @@ NEWS_RSS_URLS: Tuple[str, ...] = _json_env(
 )
 
 
+# -------------------------
+# Report cache
+# -------------------------
+
+REPORT_CACHE_ENABLED: bool = os.getenv("REPORT_CACHE", "1") != "0"
+REPORT_CACHE_DIR: Path = repo_path(os.getenv("REPORT_CACHE_DIR", "data/cache"))  # same root as DUCKDB_PATH
+
+
 # -------------------------
 # Tavily search (optional)
 # -------------------------
@@ -167,6 +194,9 @@ __all__ = [
     "NEWS_RANK_KW_W",
     "NEWS_KEYWORDS",
     "NEWS_RSS_URLS",
+    # Report cache
+    "REPORT_CACHE_ENABLED",
+    "REPORT_CACHE_DIR",
     # Tavily
     "TAVILY_API_KEY",
     "TAVILY_SEARCH_DEPTH",
@@ -1,18 +1,30 @@
 from __future__ import annotations
 import duckdb as ddb
+import numpy as np
+import queue
+from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
 import os
 
+from .schemas import SeriesColumnar
+from .settings import repo_path
+
+@cache
 def resolve_db_path() -> Path:
-    p = os.getenv("DUCKDB_PATH", "data/srag.duckdb")
-    path = Path(p)
-    if not path.is_absolute():
-        # ascend to repo root by pyproject.toml
-        cur = Path.cwd()
-        while cur != cur.parent and not (cur / "pyproject.toml").exists():
-            cur = cur.parent
-        path = cur / path
-    return path
+    """Resolve DUCKDB_PATH once per process (call `resolve_db_path.cache_clear()` after changing it)."""
+    return repo_path(os.getenv("DUCKDB_PATH", "data/srag.duckdb"))
+
+def _columnar(xs, ys) -> SeriesColumnar:
+    """numpy (possibly masked) columns -> SeriesColumnar with ISO-date xs and no NaN ys."""
+    ys = np.ma.filled(np.ma.asarray(ys, dtype=np.float64), np.nan)
+    xs = np.ma.getdata(xs)
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = np.datetime_as_string(xs, unit="D")
+    else:
+        xs = np.asarray(xs, dtype=str)
+    keep = ~np.isnan(ys)
+    return SeriesColumnar(xs[keep], ys[keep])
 
 class SQLClient:
     """Minimal DuckDB read-only client."""
@@ -22,9 +34,64 @@ class SQLClient:
         if not self.db_path.exists():
             raise FileNotFoundError(f"DuckDB not found at {self.db_path}")
         self.con = ddb.connect(str(self.db_path), read_only=True)
+        self._pool: queue.SimpleQueue[SQLClient] = queue.SimpleQueue()
 
     def df(self, sql: str, params: dict | None = None):
         return self.con.execute(sql, params or {}).df()
 
+    def arrow(self, sql: str, params: dict | None = None):
+        """Run `sql` and return a pyarrow.Table (zero-copy; no pandas objects)."""
+        res = self.con.execute(sql, params or {}).arrow()
+        # duckdb >= 1.4 returns a RecordBatchReader, older versions a Table.
+        return res.read_all() if hasattr(res, "read_all") else res
+
+    def series(self, sql: str, params: dict | None = None, *, x: str = "x", y: str = "y") -> SeriesColumnar:
+        """Run `sql` and return columns `x`/`y` as a SeriesColumnar (no DataFrame, NaN/NULL y dropped)."""
+        cols = self.con.execute(sql, params or {}).fetchnumpy()
+        return _columnar(cols[x], cols[y])
+
+    def series_bundle(
+        self, sql: str, params: dict | None = None, *, tag: str = "series", x: str = "x", y: str = "y"
+    ) -> dict[str, SeriesColumnar]:
+        """Run a tagged UNION ALL query once and split it into one SeriesColumnar per tag."""
+        cols = self.con.execute(sql, params or {}).fetchnumpy()
+        tags = np.asarray(cols[tag], dtype=str)
+        return {str(t): _columnar(cols[x][tags == t], cols[y][tags == t]) for t in np.unique(tags)}
+
+    def cursor(self) -> "SQLClient":
+        """Return a client on a duplicate connection (one per worker thread)."""
+        child = object.__new__(SQLClient)
+        child.db_path = self.db_path
+        child.con = self.con.cursor()
+        child._pool = queue.SimpleQueue()
+        return child
+
+    @contextmanager
+    def pooled(self):
+        """
+        Borrow a cursor from this client's pool (created on demand, returned on exit).
+        Each borrower has the cursor to itself, so worker threads can share one client.
+        """
+        try:
+            child = self._pool.get_nowait()
+        except queue.Empty:
+            child = self.cursor()
+        try:
+            yield child
+        finally:
+            self._pool.put(child)
+
     def close(self):
+        """Close pooled cursors and the connection (releases the DuckDB file lock)."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
         self.con.close()
+
+    def __enter__(self) -> "SQLClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -8,9 +8,12 @@ Key functions
 -------------
 - build_schema_snapshot(): PT snapshot of gold tables + metrics + whitelist.
 - answer_data_question(): LLM answers using ONLY the snapshot context.
-- nl_to_sql(): NL (PT) → safe DuckDB SELECT SQL (only gold tables/columns).
+- nl_to_sql(): NL (PT) → safe DuckDB SELECT SQL (only gold tables/columns); replays SQL that
+  query_nl ran successfully (cached 24h on disk).
 - run_sql_text_safe(): executes read-only SELECT with whitelist + LIMIT.
 - query_nl(): high-level (NL → SQL → DataFrame, returns (df, sql_used)).
+- glossary_lookup(): PT definition for a term/metric (exact, alias or fuzzy match).
+- get_series(): daily (30d) / monthly (12m) case series for BR or one UF.
 
 Env (optional)
 --------------
@@ -21,14 +24,21 @@ Env (optional)
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from difflib import get_close_matches
+from functools import lru_cache
+from typing import TYPE_CHECKING, AbstractSet, Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
 import os
 import re
-import textwrap
-import pandas as pd
+import unicodedata
 
-from .sql_client import SQLClient
-from .llm_router import generate_text
+from .cache import load_completion, store_completion
+from . import queries as Q
+
+# pandas, DuckDB and the LLM SDKs are imported where used, so glossary-only
+# callers (CLI, health checks) do not pay for them at import time.
+if TYPE_CHECKING:
+    import pandas as pd
+    from .sql_client import SQLClient
 
 # If you keep a metrics registry, we merge it; otherwise keep empty.
 try:
@@ -44,6 +54,7 @@ except Exception:
 GOLD_DAILY = os.getenv("GOLD_DAILY_TABLE", "gold.fct_daily_uf")
 GOLD_MONTHLY = os.getenv("GOLD_MONTHLY_TABLE", "gold.fct_monthly_uf")
 _ALLOWED_TABLES = [GOLD_DAILY, GOLD_MONTHLY]
+_ALLOWED_TABLES_SET: FrozenSet[str] = frozenset(_ALLOWED_TABLES)
 
 
 # -----------------------------------------------------------------------------
@@ -110,14 +121,138 @@ _STATIC_METRICS_PT: Dict[str, Dict[str, Any]] = {
 }
 
 
+# -----------------------------------------------------------------------------
+# Glossary (PT) for "o que é ...?" questions
+# -----------------------------------------------------------------------------
+
+GLOSSARY_PT: Dict[str, str] = {
+    "SRAG": (
+        "Síndrome Respiratória Aguda Grave: quadro respiratório agudo com sinais de gravidade "
+        "(ex.: dispneia, saturação baixa) que leva à notificação no SIVEP-Gripe."
+    ),
+    "UF": "Unidade da Federação (estado ou DF), identificada pela sigla de 2 letras.",
+    "as_of": (
+        "Data de corte: último dia com dados disponíveis. Todas as janelas (7d, 30d, 12m) "
+        "são ancoradas nessa data."
+    ),
+    "caso encerrado": (
+        "Caso com evolução conhecida (cura ou óbito) dentro da coorte de 30 dias; "
+        "é o denominador do CFR."
+    ),
+    "caso pendente": (
+        "Caso ainda sem evolução registrada após 60 dias da notificação (estimativa)."
+    ),
+    "média móvel (7 dias)": (
+        "Média dos últimos 7 dias de uma série diária; suaviza o efeito de fins de semana "
+        "e atrasos de digitação."
+    ),
+    "tempo sintoma-notificação": (
+        "Mediana, em dias, entre o início dos sintomas e a notificação do caso."
+    ),
+    "permanência em UTI": "Mediana, em dias, entre a entrada e a saída da UTI.",
+    **{
+        m["label"]: " ".join(filter(None, (m.get("description_pt"), m.get("notes_pt"))))
+        for m in _METRICS_DICT.values()
+        if m.get("label") and m.get("description_pt")
+    },
+}
+
+# Everyday names for the registry metrics (alias -> metric id).
+_METRIC_TERMS_PT: Dict[str, str] = {
+    "cfr": "cfr_30d_closed",
+    "crf": "cfr_30d_closed",
+    "letalidade": "cfr_30d_closed",
+    "taxa de letalidade": "cfr_30d_closed",
+    "case fatality rate": "cfr_30d_closed",
+    "uti": "icu_rate_30d",
+    "taxa de uti": "icu_rate_30d",
+    "icu rate": "icu_rate_30d",
+    "vacinacao": "vaccinated_rate_30d",
+    "taxa de vacinacao": "vaccinated_rate_30d",
+    "vaccinated rate": "vaccinated_rate_30d",
+    "crescimento": "growth_7d",
+    "taxa de aumento": "growth_7d",
+    "growth": "growth_7d",
+}
+
+# alias (PT/EN, abbreviations, metric ids) -> GLOSSARY_PT key
+ALIASES_PT: Dict[str, str] = {
+    "sindrome respiratoria aguda grave": "SRAG",
+    "estado": "UF",
+    "data de corte": "as_of",
+    "encerrado": "caso encerrado",
+    "casos encerrados": "caso encerrado",
+    "pendente": "caso pendente",
+    "casos pendentes": "caso pendente",
+    "media movel": "média móvel (7 dias)",
+    "ma7": "média móvel (7 dias)",
+    "cases_ma7": "média móvel (7 dias)",
+    "atraso de notificacao": "tempo sintoma-notificação",
+    "tempo de permanencia em uti": "permanência em UTI",
+    **{mid: m["label"] for mid, m in _METRICS_DICT.items() if m.get("label")},
+    **{
+        alias: _METRICS_DICT[mid]["label"]
+        for alias, mid in _METRIC_TERMS_PT.items()
+        if _METRICS_DICT.get(mid, {}).get("label")
+    },
+}
+
+_RE_NONALNUM = re.compile(r"[^a-z0-9\s._-]")
+_RE_WS = re.compile(r"\s+")
+# U+0300..U+036F (combining diacritics) -> deleted by str.translate
+_COMBINING_DROP = dict.fromkeys(range(0x0300, 0x036F + 1))
+
+
+def _normalize_text(s: str) -> str:
+    """Lowercase, strip accents and punctuation (keeps . _ -), collapse whitespace."""
+    s = (s or "").lower().strip()
+    if not s.isascii():
+        s = unicodedata.normalize("NFD", s).translate(_COMBINING_DROP)
+    return _RE_WS.sub(" ", _RE_NONALNUM.sub(" ", s)).strip()
+
+
+# Normalized once at import: normalized key -> GLOSSARY_PT key.
+_NORM_GLOSSARY: Dict[str, str] = {_normalize_text(k): k for k in GLOSSARY_PT}
+_NORM_ALIASES: Dict[str, str] = {_normalize_text(k): v for k, v in ALIASES_PT.items()}
+_CANDIDATES: Tuple[str, ...] = tuple(_NORM_GLOSSARY) + tuple(_NORM_ALIASES)
+
+
+def _resolve_glossary_key(t: str) -> Optional[str]:
+    return _NORM_ALIASES.get(t) or _NORM_GLOSSARY.get(t)
+
+
+@lru_cache(maxsize=1024)
+def _glossary_definition(t: str) -> str:
+    """Resolve an already-normalized term; memoized on the normalized string."""
+    key = _resolve_glossary_key(t)
+    if key is None:
+        close = get_close_matches(t, _CANDIDATES, n=1, cutoff=0.66)
+        key = _resolve_glossary_key(close[0]) if close else None
+    if key is None:
+        return "não documentado no glossário."
+    return GLOSSARY_PT[key]
+
+
+def glossary_lookup(term: str) -> str:
+    """Return the PT definition for `term` (exact, alias, then fuzzy match)."""
+    t = _normalize_text(term)
+    if not t:
+        return "Informe o termo ou a métrica que deseja explicar."
+    return _glossary_definition(t)
+
+
 # -----------------------------------------------------------------------------
 # Snapshot + prompt rendering
 # -----------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
 def build_schema_snapshot() -> Dict[str, Any]:
-    """Return PT snapshot used to ground LLM prompts (gold tables only)."""
+    """Return PT snapshot used to ground LLM prompts (gold tables only).
+
+    Static for the process lifetime, so it is built once; treat it as read-only.
+    """
     tables = list(_STATIC_TABLES_PT)
-    allowed = [t["name"] for t in tables] or list(_ALLOWED_TABLES)
+    allowed = frozenset(t["name"] for t in tables) or _ALLOWED_TABLES_SET
     return {"tables": tables, "metrics": _STATIC_METRICS_PT, "allowed_tables": allowed}
 
 
@@ -149,60 +284,120 @@ def _render_schema_for_prompt(snapshot: Dict[str, Any], max_cols: int = 500) ->
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=1)
+def _default_schema_context() -> str:
+    """Rendered context for the default snapshot (rendered once per process)."""
+    return _render_schema_for_prompt(build_schema_snapshot())
+
+
+def _schema_context(snapshot: Optional[Dict[str, Any]]) -> str:
+    if snapshot is None or snapshot is build_schema_snapshot():
+        return _default_schema_context()
+    return _render_schema_for_prompt(snapshot)
+
+
+# -----------------------------------------------------------------------------
+# DuckDB client
+# -----------------------------------------------------------------------------
+
+def _client() -> SQLClient:
+    """
+    Read-only client for one tool call; use it as a context manager. Closing it
+    releases the DuckDB file lock, which a long-lived handle would hold against
+    the ETL writer.
+    """
+    from .sql_client import SQLClient
+
+    return SQLClient()
+
+
 # -----------------------------------------------------------------------------
 # Safe SQL execution (read-only)
 # -----------------------------------------------------------------------------
 
-_SQL_FORBIDDEN = re.compile(
-    r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|DROP|ALTER|TRUNCATE|ATTACH|DETACH|COPY|REPLACE|GRANT|REVOKE)\b",
-    re.IGNORECASE,
-)
+_SQL_FORBIDDEN: FrozenSet[str] = frozenset({
+    "INSERT", "UPDATE", "DELETE", "MERGE", "CREATE", "DROP", "ALTER",
+    "TRUNCATE", "ATTACH", "DETACH", "COPY", "REPLACE", "GRANT", "REVOKE",
+})
+# Word tokens with the same boundaries as \b...\b (letters, digits, underscore).
+_RE_WORD = re.compile(r"[A-Z0-9_]+")
+# Compiled once; all patterns are ASCII, so IGNORECASE stays cheap.
+_RE_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([a-zA-Z0-9_.]+)", re.IGNORECASE)
+_RE_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_RE_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\b", re.IGNORECASE)
+# The escape hatch the NL→SQL prompt asks for when a question can't be answered.
+_RE_UNAVAILABLE = re.compile(r"^\s*SELECT\s+'indisponivel'\s+AS\s+motivo\b", re.IGNORECASE)
+
+
+def _unavailable_df() -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.DataFrame({"motivo": ["indisponivel"]})
 
 def _extract_tables_from_sql(sql: str) -> List[str]:
     """Naive FROM/JOIN table extractor for whitelist checks."""
-    pats = [r"\bFROM\s+([a-zA-Z0-9_\.]+)", r"\bJOIN\s+([a-zA-Z0-9_\.]+)"]
-    tables: List[str] = []
-    for p in pats:
-        for m in re.finditer(p, sql, flags=re.IGNORECASE):
-            tables.append(m.group(1))
-    # de-dup preserving order
-    seen, out = set(), []
-    for t in tables:
-        if t not in seen:
-            out.append(t)
-            seen.add(t)
-    return out
-
-
-def run_sql_text_safe(sql: str, *, max_rows: int = 500, allowed_tables: Optional[List[str]] = None) -> pd.DataFrame:
-    """Execute a *read-only* SELECT with whitelist + LIMIT enforcement."""
-    clean = sql.strip().rstrip(";")
+    # one scan; dict.fromkeys de-dups preserving first-seen order
+    return list(dict.fromkeys(m.group(1) for m in _RE_TABLES.finditer(sql)))
+
 
-    if not re.match(r"^\s*SELECT\b", clean, flags=re.IGNORECASE):
+def _validate_select(clean: str, allowed_tables: Optional[AbstractSet[str]]) -> None:
+    """Raise ValueError unless `clean` is a single read-only SELECT over allowed tables."""
+    if not _RE_SELECT.match(clean):
         raise ValueError("Somente SELECT é permitido.")
 
-    if _SQL_FORBIDDEN.search(clean):
+    if not _SQL_FORBIDDEN.isdisjoint(_RE_WORD.findall(clean.upper())):
         raise ValueError("Palavra-chave SQL proibida detectada.")
 
-    used_tables = _extract_tables_from_sql(clean)
     if allowed_tables:
-        for t in used_tables:
-            if t not in allowed_tables:
+        allowed = frozenset(allowed_tables)  # no copy when already a frozenset
+        for t in _extract_tables_from_sql(clean):
+            if t not in allowed:
                 raise ValueError(f"Tabela não permitida neste contexto: {t}")
 
+
+def run_sql_text_safe(
+    sql: str, *, max_rows: int = 500, allowed_tables: Optional[AbstractSet[str]] = None
+) -> pd.DataFrame:
+    """Execute a *read-only* SELECT with whitelist + LIMIT enforcement."""
+    clean = sql.strip().rstrip(";")
+
+    # cheap path first: the "can't answer" sentinel needs no validation nor DuckDB
+    if _RE_UNAVAILABLE.match(clean):
+        return _unavailable_df()
+
+    _validate_select(clean, allowed_tables)
+
     # LIMIT
-    if re.search(r"\bLIMIT\s+\d+\b", clean, flags=re.IGNORECASE):
-        clean = re.sub(
-            r"\bLIMIT\s+(\d+)\b",
-            lambda m: f"LIMIT {min(int(m.group(1)), max_rows)}",
-            clean,
-            flags=re.IGNORECASE,
-        )
+    if _RE_LIMIT.search(clean):
+        clean = _RE_LIMIT.sub(lambda m: f"LIMIT {min(int(m.group(1)), max_rows)}", clean)
     else:
         clean = f"{clean} LIMIT {max_rows}"
 
-    client = SQLClient()
-    return client.df(clean)
+    with _client() as sql:
+        return sql.df(clean)
+
+
+# -----------------------------------------------------------------------------
+# Time series (trend intent)
+# -----------------------------------------------------------------------------
+
+def get_series(scope: str = "br", uf: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Return {'daily': df(x, y), 'monthly': df(x, y)} for BR or a single UF (one query)."""
+    import pandas as pd
+    import pyarrow.compute as pc
+
+    with _client() as sql:
+        if scope == "uf" and uf:
+            tbl = sql.arrow(Q.SQL_SERIES_BUNDLE_UF, {"uf": uf.upper()})
+        else:
+            tbl = sql.arrow(Q.SQL_SERIES_BUNDLE_BR)
+    # pandas only at the boundary, backed by the Arrow buffers (ArrowDtype).
+    return {
+        name: tbl.filter(pc.equal(tbl["series"], name))
+                 .select(["x", "y"])
+                 .to_pandas(types_mapper=pd.ArrowDtype)
+        for name in ("daily", "monthly")
+    }
 
 
 # -----------------------------------------------------------------------------
@@ -221,37 +416,61 @@ Regras:
   sobre o período. NÃO some colunas já janeladas como `*_30d` ao longo de várias datas,
   pois isso superconta. As colunas `*_30d` representam janelas já agregadas e devem ser
   usadas isoladamente (ex.: último dia), não somadas em múltiplos dias.
-""".format(daily=GOLD_DAILY, monthly=GOLD_MONTHLY)
+"""
 
+# Identical (schema, question) pairs replay the stored SQL for a day.
+_NL2SQL_CACHE_TTL_S = 24 * 3600
 
-def nl_to_sql(question_pt: str, snapshot: Optional[Dict[str, Any]] = None, *, default_limit: int = 200) -> str:
-    """Translate a PT question into a safe DuckDB SELECT SQL (gold tables only)."""
-    snapshot = snapshot or build_schema_snapshot()
-    ctx = _render_schema_for_prompt(snapshot)
+_NL2SQL_USER_TMPL = """CONTEXTO — Dicionário de dados (GOLD) e tabelas permitidas:
+{ctx}
 
-    user = textwrap.dedent(f"""
-    CONTEXTO — Dicionário de dados (GOLD) e tabelas permitidas:
-    {ctx}
+Pergunta do usuário (PT-BR):
+{question_pt}
 
-    Pergunta do usuário (PT-BR):
-    {question_pt}
+Requisito: retorne **APENAS** o SQL (uma ou mais linhas), sem comentários.
+Se for impossível responder com as tabelas/colunas listadas, retorne:
+SELECT 'indisponivel' AS motivo;"""
 
-    Requisito: retorne **APENAS** o SQL (uma ou mais linhas), sem comentários.
-    Se for impossível responder com as tabelas/colunas listadas, retorne:
-    SELECT 'indisponivel' AS motivo;
-    """).strip()
+
+def _nl2sql_cache_key(user: str, default_limit: int) -> str:
+    # default_limit shapes the stored SQL, so it is part of the cache key
+    return f"{user}\x00{default_limit}"
+
+
+def nl_to_sql(question_pt: str, snapshot: Optional[Dict[str, Any]] = None, *, default_limit: int = 200) -> str:
+    """
+    Translate a PT question into a safe DuckDB SELECT SQL (gold tables only).
+
+    Replays SQL stored by query_nl; fresh replies are not stored here, since
+    they have not been validated or executed yet.
+    """
+    user = _NL2SQL_USER_TMPL.format(ctx=_schema_context(snapshot), question_pt=question_pt)
+    cached = load_completion(_nl2sql_cache_key(user, default_limit), _SYSTEM_NL2SQL, max_age_s=_NL2SQL_CACHE_TTL_S)
+    if cached is not None:
+        return cached
+
+    from .llm_router import generate_text
 
     sql = generate_text(user, _SYSTEM_NL2SQL, temperature=0.0, max_tokens=400).strip()
-    if not re.search(r"\bLIMIT\s+\d+\b", sql, flags=re.IGNORECASE):
+    if not _RE_LIMIT.search(sql):
         sql = f"{sql.rstrip(';')} LIMIT {default_limit}"
     return sql
 
 
 def query_nl(question_pt: str, *, max_rows: int = 500) -> Tuple[pd.DataFrame, str]:
     """High-level: NL → SQL (LLM) → safe execution on GOLD tables."""
-    snapshot = build_schema_snapshot()
-    sql = nl_to_sql(question_pt, snapshot=snapshot, default_limit=min(max_rows, 200))
-    df = run_sql_text_safe(sql, max_rows=max_rows, allowed_tables=snapshot["allowed_tables"])
+    # Default snapshot: pre-rendered context + module-level whitelist, no dict lookups.
+    default_limit = min(max_rows, 200)
+    sql = nl_to_sql(question_pt, default_limit=default_limit)
+    if _RE_UNAVAILABLE.match(sql):
+        df = _unavailable_df()
+    else:
+        df = run_sql_text_safe(sql, max_rows=max_rows, allowed_tables=_ALLOWED_TABLES_SET)
+    # only SQL that validated and ran (or the "unavailable" sentinel) is replayed
+    user = _NL2SQL_USER_TMPL.format(ctx=_default_schema_context(), question_pt=question_pt)
+    store_completion(
+        _nl2sql_cache_key(user, default_limit), _SYSTEM_NL2SQL, sql, max_age_s=_NL2SQL_CACHE_TTL_S
+    )
     return df, sql
 
 
@@ -268,9 +487,43 @@ Responda **somente** com base no contexto fornecido (tabelas/colunas/métricas).
 - Seja conciso e objetivo (2–6 linhas).
 """
 
+
+def _data_question_prompt(question_pt: str) -> str:
+    ctx = _default_schema_context()
+    return f"Contexto de dados (GOLD):\n{ctx}\n\nPergunta do usuário (PT-BR):\n{question_pt}"
+
+
+# Answers depend only on the (static) dictionary snapshot and the question, so
+# repeated questions replay the stored answer for 10 minutes.
+_DATA_QA_CACHE_TTL_S = 600
+
+
 def answer_data_question(question_pt: str, *, max_tokens: int = 700) -> str:
     """Answer data questions using ONLY the static PT dictionary snapshot (gold)."""
-    snapshot = build_schema_snapshot()
-    ctx = _render_schema_for_prompt(snapshot)
-    user = f"Contexto de dados (GOLD):\n{ctx}\n\nPergunta do usuário (PT-BR):\n{question_pt}"
-    return generate_text(user, _SYSTEM_DATA_QA, temperature=0.0, max_tokens=max_tokens)
+    user = _data_question_prompt(question_pt)
+    cached = load_completion(user, _SYSTEM_DATA_QA, max_age_s=_DATA_QA_CACHE_TTL_S)
+    if cached is not None:
+        return cached
+
+    from .llm_router import generate_text
+
+    ans = generate_text(user, _SYSTEM_DATA_QA, temperature=0.0, max_tokens=max_tokens)
+    store_completion(user, _SYSTEM_DATA_QA, ans, max_age_s=_DATA_QA_CACHE_TTL_S)
+    return ans
+
+
+def stream_data_answer(question_pt: str, *, max_tokens: int = 700) -> Iterator[str]:
+    """Streaming variant of answer_data_question (yields the answer in chunks)."""
+    user = _data_question_prompt(question_pt)
+    cached = load_completion(user, _SYSTEM_DATA_QA, max_age_s=_DATA_QA_CACHE_TTL_S)
+    if cached is not None:
+        yield cached
+        return
+
+    from .llm_router import stream_text
+
+    parts: List[str] = []
+    for piece in stream_text(user, _SYSTEM_DATA_QA, temperature=0.0, max_tokens=max_tokens):
+        parts.append(piece)
+        yield piece
+    store_completion(user, _SYSTEM_DATA_QA, "".join(parts).strip(), max_age_s=_DATA_QA_CACHE_TTL_S)
@@ -5,25 +5,111 @@ Keeps data as raw as possible; no heavy transformations here.
 """
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from case_indicium.utils.config import (
+    BRONZE_MODE,
+    BRONZE_PARQUET_CACHE,
+    BRONZE_PARQUET_DIR,
     DUCKDB_PATH,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIR,
     SCHEMA_BRONZE,
     BRONZE_TABLE,
     DATA_URLS_PATH,
 )
 from case_indicium.utils.duck import connect
-from case_indicium.utils.io import load_year_url_manifest
+from case_indicium.utils.io import load_year_url_manifest, resource_etag
 
+# bronze.ingest_meta: which (url, etag) each cached Parquet year was built from.
+_META_TABLE = "ingest_meta"
 
-def build_bronze_from_manifest(manifest_path=DATA_URLS_PATH, *, db_path=DUCKDB_PATH) -> None:
+
+# Opções de leitura comuns aos dois modos.
+_CSV_OPTS = "HEADER=TRUE, DELIM=';', SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE"
+
+# union_only: uma leitura sobre a lista de arquivos; o DuckDB lê os CSVs em
+# paralelo e alinha colunas por nome; o ano vem do manifest via filename.
+_SQL_UNION_ONLY = f"""
+WITH manifest AS (
+  SELECT unnest(?::VARCHAR[]) AS source_url, unnest(?::INTEGER[]) AS year
+)
+SELECT r.* EXCLUDE (filename), m.year
+FROM read_csv_auto(?, {_CSV_OPTS}, UNION_BY_NAME=TRUE, FILENAME=TRUE) r
+JOIN manifest m ON m.source_url = r.filename
+""".strip()
+
+# per_year: um SELECT parametrizado por ano, unidos por nome (cada arquivo
+# tem seu próprio sniffing; útil quando um ano tem layout atípico).
+_SQL_ONE_YEAR = f"SELECT *, CAST(? AS INTEGER) AS year FROM read_csv_auto(?, {_CSV_OPTS})"
+
+
+def _load_query(items: List[Tuple[int, str]], mode: str) -> Tuple[str, List[object]]:
+    """Return (SQL, params) that reads every manifest CSV as VARCHAR plus a year column."""
+    if mode == "per_year":
+        sql = "\nUNION ALL BY NAME\n".join(_SQL_ONE_YEAR for _ in items)
+        return sql, [v for year, url in items for v in (year, url)]
+    if mode != "union_only":
+        raise ValueError(f"BRONZE_MODE inválido: {mode!r} (use 'union_only' ou 'per_year')")
+    urls = [url for _, url in items]
+    return _SQL_UNION_ONLY, [urls, [year for year, _ in items], urls]
+
+
+def _parquet_path(year: int) -> Path:
+    return BRONZE_PARQUET_DIR / f"bronze_{int(year)}.parquet"
+
+
+def _split_cached(
+    con, items: List[Tuple[int, str]], etags: Dict[int, Optional[str]]
+) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+    """Split items into (fresh: Parquet still valid, stale: must be read from CSV)."""
+    con.execute(
+        f"CREATE TABLE IF NOT EXISTS {_META_TABLE} "
+        "(year INTEGER PRIMARY KEY, source_url VARCHAR, etag VARCHAR, ingested_at TIMESTAMP);"
+    )
+    meta = {y: (u, e) for y, u, e in con.execute(f"SELECT year, source_url, etag FROM {_META_TABLE};").fetchall()}
+    fresh, stale = [], []
+    for year, url in items:
+        etag = etags.get(year)
+        ok = etag is not None and meta.get(year) == (url, etag) and _parquet_path(year).exists()
+        (fresh if ok else stale).append((year, url))
+    return fresh, stale
+
+
+def _export_parquet(con, stale: List[Tuple[int, str]], etags: Dict[int, Optional[str]]) -> None:
+    """Write one ZSTD Parquet per freshly read year and record its (url, etag)."""
+    BRONZE_PARQUET_DIR.mkdir(parents=True, exist_ok=True)
+    for year, url in stale:
+        etag = etags.get(year)
+        if etag is None:
+            continue  # unknown version: nothing to validate the copy against
+        path = str(_parquet_path(year)).replace("'", "''")
+        con.execute(
+            f"COPY (SELECT * FROM {BRONZE_TABLE} WHERE year = {int(year)}) "
+            f"TO '{path}' (FORMAT PARQUET, COMPRESSION ZSTD);"
+        )
+        con.execute(f"INSERT OR REPLACE INTO {_META_TABLE} VALUES (?, ?, ?, now());", [year, url, etag])
+
+
+def build_bronze_from_manifest(
+    manifest_path=DATA_URLS_PATH,
+    *,
+    db_path=DUCKDB_PATH,
+    mode: str = BRONZE_MODE,
+    use_parquet_cache: bool = BRONZE_PARQUET_CACHE,
+) -> None:
     """
-    Build bronze.raw_all by UNION ALL BY NAME over yearly CSVs (HTTP).
+    Build bronze.raw_all from yearly CSVs (HTTP).
 
     Notes:
         - ALL_VARCHAR=TRUE: read all columns as TEXT in Bronze (robust to dirty values).
         - SAMPLE_SIZE=-1: scan full file for consistent parsing options.
         - DELIM=';': SIVEP CSVs usam ';' (padroniza leitura).
+        - mode (BRONZE_MODE): 'union_only' lê todos os anos numa única leitura
+          multi-arquivo (UNION_BY_NAME); 'per_year' monta um SELECT por ano.
+        - BRONZE_PARQUET_CACHE: anos cujo (url, ETag) não mudou são lidos do
+          Parquet em BRONZE_PARQUET_DIR; só os demais são relidos do CSV.
         - Tipagem/conversões ficam para a Silver.
     """
     manifest: Dict[str, str] = load_year_url_manifest(manifest_path)
@@ -31,30 +117,42 @@ def build_bronze_from_manifest(manifest_path=DATA_URLS_PATH, *, db_path=DUCKDB_P
     # (year, url) ordenado
     items: List[Tuple[int, str]] = sorted(((int(y), url) for y, url in manifest.items()),
                                           key=lambda t: t[0])
+    etags: Dict[int, Optional[str]] = (
+        {year: resource_etag(url) for year, url in items} if use_parquet_cache else {}
+    )
 
-    # Monta cadeia de UNION ALL BY NAME lendo cada ano como VARCHAR
-    selects: List[str] = []
-    for year, url in items:
-        selects.append(
-            # header=true + all_varchar=true evita ConversionException
-            f"""
-            SELECT *, {year}::INT AS year
-            FROM read_csv_auto(
-              '{url}',
-              HEADER=TRUE,
-              DELIM=';',
-              SAMPLE_SIZE=-1,
-              ALL_VARCHAR=TRUE
-            )
-            """.strip()
-        )
+    # Escreve tabela bronze.raw_all
+    # Parse CSVs on every core.
+    with connect(
+        db_path,
+        read_only=False,
+        schema=SCHEMA_BRONZE,
+        threads=os.cpu_count(),
+        memory_limit=DUCKDB_MEMORY_LIMIT,
+        temp_directory=DUCKDB_TEMP_DIR,
+    ) as con:
+        # Reuse parsed metadata across reads.
+        con.execute("SET enable_object_cache = true;")
 
-    union_sql = "\nUNION ALL BY NAME\n".join(selects)
+        fresh, stale = _split_cached(con, items, etags) if use_parquet_cache else ([], items)
+        parts: List[str] = []
+        params: List[object] = []
+        if stale:
+            csv_sql, csv_params = _load_query(stale, mode)
+            parts.append(f"SELECT * FROM ({csv_sql})")
+            params += csv_params
+        if fresh:
+            parts.append("SELECT * FROM read_parquet(?, union_by_name=true)")
+            params.append([str(_parquet_path(year)) for year, _ in fresh])
+        load_sql = "\nUNION ALL BY NAME\n".join(parts)
 
-    # Escreve tabela bronze.raw_all
-    with connect(db_path, read_only=False, schema=SCHEMA_BRONZE) as con:
         con.execute(f"DROP TABLE IF EXISTS {BRONZE_TABLE};")
-        con.execute(f"CREATE TABLE {BRONZE_TABLE} AS\n{union_sql};")
+        con.execute(f"CREATE TABLE {BRONZE_TABLE} AS\n{load_sql};", params)
+        if use_parquet_cache and stale:
+            _export_parquet(con, stale, etags)
 
         n = con.execute(f"SELECT COUNT(*) FROM {BRONZE_TABLE};").fetchone()[0]
-        print(f"[bronze] created {SCHEMA_BRONZE}.{BRONZE_TABLE} rows={n}")
+        print(
+            f"[bronze] created {SCHEMA_BRONZE}.{BRONZE_TABLE} rows={n} mode={mode} "
+            f"csv_years={len(stale)} parquet_years={len(fresh)}"
+        )
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import os
 
-from case_indicium.etl.urls import refresh_2025_url_in_manifest
-from case_indicium.etl.bronze_ingest import ingest_bronze_from_manifest
+from case_indicium.utils.io import refresh_2025_url_in_manifest
+from case_indicium.etl.bronze_ingest import build_bronze_from_manifest
 
 # Defaults can be overridden via environment variables or .env
 DUCKDB_PATH = os.getenv("DUCKDB_PATH", "data/srag.duckdb")
@@ -18,7 +18,7 @@ def main() -> None:
       2) Ingest all years from the manifest into DuckDB bronze tables.
     """
     refresh_2025_url_in_manifest(MANIFEST_PATH)
-    ingest_bronze_from_manifest(MANIFEST_PATH, DUCKDB_PATH)
+    build_bronze_from_manifest(MANIFEST_PATH, db_path=DUCKDB_PATH)
     print(f"Bronze ETL completed. DuckDB at: {DUCKDB_PATH}")
 
 
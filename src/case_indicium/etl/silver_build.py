@@ -3,17 +3,25 @@ Silver build: normalize and curate fields from bronze.raw_all to silver.cases.
 """
 from __future__ import annotations
 
+import os
+import re
+from pathlib import Path
+
 import duckdb
 
 from case_indicium.utils.config import (
     DUCKDB_PATH,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIR,
     SCHEMA_BRONZE,
     SCHEMA_SILVER,
     BRONZE_TABLE,
     SILVER_TABLE,
     PENDING_DAYS,
+    SILVER_PARQUET,
+    SILVER_PARQUET_PATH,
 )
-from case_indicium.utils.duck import connect
+from case_indicium.utils.duck import connect, list_columns
 
 
 def _column_exists(con: duckdb.DuckDBPyConnection, schema: str, table: str, column: str) -> bool:
@@ -23,148 +31,173 @@ def _column_exists(con: duckdb.DuckDBPyConnection, schema: str, table: str, colu
     Returns:
         True if column exists.
     """
-    row = con.execute(
+    return column in list_columns(con, schema, table)
+
+
+# Date columns always present in bronze (DT_ENCERRA is optional, see below).
+_DATE_COLUMNS = ("DT_NOTIFIC", "DT_SIN_PRI", "DT_EVOLUCA", "DT_ENTUTI", "DT_SAIDUTI")
+_RE_DMY = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+
+# Session-scoped date parsers (one per format order); TEMP so they are not
+# persisted in the database file. Both return DATE (4 bytes/row): SRAG dates
+# carry no time of day, so EXTRACT/DATE_TRUNC/comparisons use the DATE kernels.
+_SQL_DATE_MACROS = """
+CREATE OR REPLACE TEMP MACRO parse_br_date(x) AS
+  COALESCE(TRY_STRPTIME(CAST(x AS VARCHAR), '%d/%m/%Y')::DATE, TRY_CAST(x AS DATE));
+CREATE OR REPLACE TEMP MACRO parse_iso_date(x) AS
+  COALESCE(TRY_CAST(x AS DATE), TRY_STRPTIME(CAST(x AS VARCHAR), '%d/%m/%Y')::DATE);
+"""
+
+
+def _pick_date_expr(con: duckdb.DuckDBPyConnection, col: str, *, sample: int = 1000) -> str:
+    """
+    Return a date-parsing SQL expression for bronze column `col`, trying the
+    format seen in a sample of non-null values first.
+
+    SRAG files use one format per year ('%d/%m/%Y' in practice), so a single
+    strptime format plus a TRY_CAST fallback (ISO dates) replaces the
+    two-format list; the fallback keeps years with the other format parsing.
+
+    Returns:
+        `parse_br_date(col)` or `parse_iso_date(col)` (see _SQL_DATE_MACROS).
+    """
+    rows = con.execute(
+        f"""
+        SELECT CAST({col} AS VARCHAR)
+        FROM {SCHEMA_BRONZE}.{BRONZE_TABLE}
+        WHERE {col} IS NOT NULL
+        LIMIT {int(sample)}
         """
-        SELECT 1
-        FROM information_schema.columns
-        WHERE table_schema = ?
-          AND table_name = ?
-          AND column_name = ?
-        """,
-        [schema, table, column],
-    ).fetchone()
-    return bool(row)
-
-
-def build_silver_cases(*, db_path=DUCKDB_PATH) -> None:
+    ).fetchall()
+    dmy = sum(1 for (v,) in rows if _RE_DMY.match(v.strip()))
+    if rows and dmy * 2 < len(rows):
+        return f"parse_iso_date({col})"
+    return f"parse_br_date({col})"
+
+
+def _export_parquet(con: duckdb.DuckDBPyConnection, path) -> None:
+    """Write silver.cases to a ZSTD Parquet file (tmp + rename, so readers never see a partial file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    quoted = str(tmp).replace("'", "''")
+    con.execute(
+        f"COPY {SILVER_TABLE} TO '{quoted}' "
+        "(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 100000);"
+    )
+    os.replace(tmp, path)
+
+
+def build_silver_cases(
+    *, db_path=DUCKDB_PATH, parquet_path=SILVER_PARQUET_PATH if SILVER_PARQUET else None
+) -> None:
     """
     Create/replace silver.cases with parsed dates, labels, flags and age bands.
 
+    Args:
+        db_path: DuckDB file to write.
+        parquet_path: Also export silver.cases here as Parquet, so downstream
+            readers need no DuckDB connection/lock (None = skip).
+
     Returns:
-        None. Writes silver.cases atomically via a temp table.
+        None. Writes silver.cases atomically with CREATE OR REPLACE TABLE.
     """
-    with connect(db_path, read_only=False, schema=SCHEMA_SILVER) as con:
+    # String parsing/casts are CPU-bound: use every core.
+    with connect(
+        db_path,
+        read_only=False,
+        schema=SCHEMA_SILVER,
+        threads=os.cpu_count(),
+        memory_limit=DUCKDB_MEMORY_LIMIT,
+        temp_directory=DUCKDB_TEMP_DIR,
+    ) as con:
         # need to read from bronze.*
         con.execute(f"SET schema '{SCHEMA_BRONZE}';")
         has_dt_encerra = _column_exists(con, SCHEMA_BRONZE, BRONZE_TABLE, "DT_ENCERRA")
         con.execute(f"SET schema '{SCHEMA_SILVER}';")
 
-        dt_encerra_expr = (
-            """
-            COALESCE(
-              TRY_STRPTIME(CAST(DT_ENCERRA AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-              TRY_CAST(DT_ENCERRA AS DATE)
-            )
-            """
-            if has_dt_encerra
-            else "NULL"
-        )
+        con.execute(_SQL_DATE_MACROS)
+        date_exprs = {c: _pick_date_expr(con, c) for c in _DATE_COLUMNS}
+        dt_encerra_expr = _pick_date_expr(con, "DT_ENCERRA") if has_dt_encerra else "NULL"
 
-        con.execute(f"DROP TABLE IF EXISTS {SILVER_TABLE}_tmp;")
         con.execute(
             f"""
-            CREATE TABLE {SILVER_TABLE}_tmp AS
-            WITH src AS (
-              SELECT *
-              FROM {SCHEMA_BRONZE}.{BRONZE_TABLE}
-            ),
-            parsed AS (
+            CREATE OR REPLACE TABLE {SILVER_TABLE} AS
+            -- Parse/cast the fields reused below once per row (strptime is the costly part)
+            WITH casts AS (
               SELECT
-                -- Dates
-                COALESCE(
-                  TRY_STRPTIME(CAST(DT_NOTIFIC AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                  TRY_CAST(DT_NOTIFIC AS DATE)
-                ) AS dt_notific,
-                COALESCE(
-                  TRY_STRPTIME(CAST(DT_SIN_PRI AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                  TRY_CAST(DT_SIN_PRI AS DATE)
-                ) AS dt_sin_pri,
-                COALESCE(
-                  TRY_STRPTIME(CAST(DT_EVOLUCA AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                  TRY_CAST(DT_EVOLUCA AS DATE)
-                ) AS dt_evoluca,
-                {dt_encerra_expr} AS dt_encerra,
-
-                -- Time keys
-                TRY_CAST(SEM_NOT AS INTEGER)    AS sem_not,
-                EXTRACT('year' FROM
-                  COALESCE(
-                    TRY_STRPTIME(CAST(DT_NOTIFIC AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                    TRY_CAST(DT_NOTIFIC AS DATE)
-                  )
-                )::INT AS ano_notific,
-                DATE_TRUNC('month',
-                  COALESCE(
-                    TRY_STRPTIME(CAST(DT_NOTIFIC AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                    TRY_CAST(DT_NOTIFIC AS DATE)
-                  )
-                ) AS mes_notific,
-
-                -- Outcomes
-                TRY_CAST(EVOLUCAO AS INTEGER)   AS evolucao_code,
-                CASE TRY_CAST(EVOLUCAO AS INTEGER)
-                  WHEN 1 THEN 'CURA'
-                  WHEN 2 THEN 'OBITO'
-                  WHEN 3 THEN 'OBITO_OUTRAS'
-                  WHEN 9 THEN 'IGNORADO'
-                  ELSE NULL
-                END AS evolucao_label,
-                TRY_CAST(CLASSI_FIN AS INTEGER) AS classi_fin,
-
-                -- ICU
-                CASE
-                  WHEN TRY_CAST(UTI AS INTEGER) = 1 THEN TRUE
-                  WHEN TRY_CAST(UTI AS INTEGER) = 2 THEN FALSE
-                  ELSE NULL
-                END AS uti_bool,
-                COALESCE(
-                  TRY_STRPTIME(CAST(DT_ENTUTI AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                  TRY_CAST(DT_ENTUTI AS DATE)
-                ) AS dt_entuti,
-                COALESCE(
-                  TRY_STRPTIME(CAST(DT_SAIDUTI AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                  TRY_CAST(DT_SAIDUTI AS DATE)
-                ) AS dt_saiduti,
-
-                -- Vaccination
-                CASE
-                  WHEN TRY_CAST(VACINA_COV AS INTEGER) = 1 THEN TRUE
-                  WHEN TRY_CAST(VACINA_COV AS INTEGER) = 2 THEN FALSE
-                  ELSE NULL
-                END AS vacinado_bool,
-
-                -- Demographics
-                TRY_CAST(NU_IDADE_N AS INTEGER) AS idade,
-                CASE
-                  WHEN TRY_CAST(NU_IDADE_N AS INTEGER) IS NULL THEN NULL
-                  WHEN TRY_CAST(NU_IDADE_N AS INTEGER) < 5 THEN '0-4'
-                  WHEN TRY_CAST(NU_IDADE_N AS INTEGER) BETWEEN 5 AND 17 THEN '5-17'
-                  WHEN TRY_CAST(NU_IDADE_N AS INTEGER) BETWEEN 18 AND 39 THEN '18-39'
-                  WHEN TRY_CAST(NU_IDADE_N AS INTEGER) BETWEEN 40 AND 59 THEN '40-59'
-                  ELSE '60+'
-                END AS faixa_etaria,
-                UPPER(TRIM(CS_SEXO))            AS sexo,
-                UPPER(TRIM(SG_UF_NOT))          AS uf,
-
-                -- Flags
-                CASE WHEN TRY_CAST(EVOLUCAO AS INTEGER) = 2 THEN TRUE ELSE FALSE END AS is_obito,
-                CASE
-                  WHEN COALESCE(
-                    TRY_STRPTIME(CAST(DT_NOTIFIC AS VARCHAR), ['%d/%m/%Y','%Y-%m-%d']),
-                    TRY_CAST(DT_NOTIFIC AS DATE)
-                  ) <= CURRENT_DATE - INTERVAL {PENDING_DAYS} DAY
-                  AND (TRY_CAST(EVOLUCAO AS INTEGER) IS NULL
-                       OR TRY_CAST(EVOLUCAO AS INTEGER) = 9
-                       OR {dt_encerra_expr} IS NULL)
-                  THEN TRUE ELSE FALSE
-                END AS pendente_60d
-              FROM src
+                *,
+                {date_exprs['DT_NOTIFIC']} AS _dt_notific,
+                {dt_encerra_expr} AS _dt_encerra,
+                TRY_CAST(EVOLUCAO AS INTEGER)   AS _evo,
+                TRY_CAST(NU_IDADE_N AS INTEGER) AS _idade,
+                TRY_CAST(UTI AS INTEGER)        AS _uti,
+                TRY_CAST(VACINA_COV AS INTEGER) AS _vac
+              FROM {SCHEMA_BRONZE}.{BRONZE_TABLE}
             )
-            SELECT * FROM parsed;
+            SELECT
+              -- Dates
+              _dt_notific                     AS dt_notific,
+              {date_exprs['DT_SIN_PRI']} AS dt_sin_pri,
+              {date_exprs['DT_EVOLUCA']} AS dt_evoluca,
+              _dt_encerra                     AS dt_encerra,
+
+              -- Time keys
+              TRY_CAST(SEM_NOT AS INTEGER)    AS sem_not,
+              EXTRACT('year' FROM _dt_notific)::INT AS ano_notific,
+              DATE_TRUNC('month', _dt_notific)::DATE AS mes_notific,
+
+              -- Outcomes
+              _evo                            AS evolucao_code,
+              CASE _evo
+                WHEN 1 THEN 'CURA'
+                WHEN 2 THEN 'OBITO'
+                WHEN 3 THEN 'OBITO_OUTRAS'
+                WHEN 9 THEN 'IGNORADO'
+                ELSE NULL
+              END AS evolucao_label,
+              TRY_CAST(CLASSI_FIN AS INTEGER) AS classi_fin,
+
+              -- ICU
+              CASE
+                WHEN _uti = 1 THEN TRUE
+                WHEN _uti = 2 THEN FALSE
+                ELSE NULL
+              END AS uti_bool,
+              {date_exprs['DT_ENTUTI']} AS dt_entuti,
+              {date_exprs['DT_SAIDUTI']} AS dt_saiduti,
+
+              -- Vaccination
+              CASE
+                WHEN _vac = 1 THEN TRUE
+                WHEN _vac = 2 THEN FALSE
+                ELSE NULL
+              END AS vacinado_bool,
+
+              -- Demographics
+              _idade                          AS idade,
+              -- bucket = 1 + number of thresholds reached (NULL age -> NULL band)
+              ['0-4', '5-17', '18-39', '40-59', '60+'][
+                1 + (_idade >= 5)::INT + (_idade >= 18)::INT
+                  + (_idade >= 40)::INT + (_idade >= 60)::INT
+              ] AS faixa_etaria,
+              UPPER(TRIM(CS_SEXO))            AS sexo,
+              UPPER(TRIM(SG_UF_NOT))          AS uf,
+
+              -- Flags
+              CASE WHEN _evo = 2 THEN TRUE ELSE FALSE END AS is_obito,
+              -- plain boolean over the precomputed columns; NULL dates -> FALSE
+              COALESCE(
+                _dt_notific <= CURRENT_DATE - INTERVAL {PENDING_DAYS} DAY
+                AND (_evo IS NULL OR _evo = 9 OR _dt_encerra IS NULL),
+                FALSE
+              ) AS pendente_60d
+            FROM casts;
             """
         )
 
-        con.execute(f"DROP TABLE IF EXISTS {SILVER_TABLE};")
-        con.execute(f"ALTER TABLE {SILVER_TABLE}_tmp RENAME TO {SILVER_TABLE};")
         n = con.execute(f"SELECT COUNT(*) FROM {SILVER_TABLE};").fetchone()[0]
         print(f"[silver] created {SCHEMA_SILVER}.{SILVER_TABLE} rows={n}")
+
+        if parquet_path is not None:
+            _export_parquet(con, Path(parquet_path))
+            print(f"[silver] exported {parquet_path}")
@@ -1,9 +1,17 @@
--- Gold views for SRAG (daily & monthly by UF)
+-- Gold layer for SRAG (daily & monthly by UF)
+-- Materialized as tables by scripts/run_gold.py (the last step of
+-- scripts/run_pipeline.py; etl/etl.py only loads bronze), so the dashboard/agent
+-- read the small roll-ups instead of re-aggregating silver.cases on every query.
+-- Tables are a snapshot: re-run scripts/run_gold.py after loading new data.
+-- Note: the *_30d columns are relative to CURRENT_DATE at build time.
+-- The *_30d / *_12m tables hold the dashboard windows (anchored to the last
+-- available day/month), so window queries scan ~30 days x 27 UFs.
+-- (scripts/run_gold.py drops the legacy views of the same name first.)
 
 CREATE SCHEMA IF NOT EXISTS gold;
 
 -- DAILY metrics by UF
-CREATE OR REPLACE VIEW gold.fct_daily_uf AS
+CREATE OR REPLACE TABLE gold.fct_daily_uf AS
 WITH base AS (
   SELECT
     dt_notific::DATE AS day,
@@ -56,7 +64,7 @@ FROM rates
 ORDER BY day, uf;
 
 -- MONTHLY metrics by UF
-CREATE OR REPLACE VIEW gold.fct_monthly_uf AS
+CREATE OR REPLACE TABLE gold.fct_monthly_uf AS
 WITH base AS (
   SELECT
     DATE_TRUNC('month', dt_notific)::DATE AS month,
@@ -100,3 +108,25 @@ SELECT
   100.0 * pending_60d_cases / NULLIF(cases, 0)     AS pending_60d_pct
 FROM agg
 ORDER BY month, uf;
+
+-- Rolling windows, anchored like agent/queries.py (as_of = last available day/month)
+CREATE OR REPLACE TABLE gold.fct_daily_uf_30d AS
+WITH as_of AS (
+  SELECT COALESCE(MAX(day), CURRENT_DATE) AS d FROM gold.fct_daily_uf
+)
+SELECT t.*
+FROM gold.fct_daily_uf t
+CROSS JOIN as_of a
+WHERE t.day > a.d - INTERVAL 30 DAY AND t.day <= a.d
+ORDER BY day, uf;
+
+CREATE OR REPLACE TABLE gold.fct_monthly_uf_12m AS
+WITH as_of AS (
+  SELECT COALESCE(DATE_TRUNC('month', MAX(month)), DATE_TRUNC('month', CURRENT_DATE)) AS m
+  FROM gold.fct_monthly_uf
+)
+SELECT t.*
+FROM gold.fct_monthly_uf t
+CROSS JOIN as_of a
+WHERE t.month >= a.m - INTERVAL 11 MONTH AND t.month <= a.m
+ORDER BY month, uf;
@@ -30,5 +30,27 @@ CENSOR_DAYS = int(os.getenv("CENSOR_DAYS", "30"))
 PENDING_DAYS = int(os.getenv("PENDING_DAYS", "60"))
 MA_WINDOW = int(os.getenv("MA_WINDOW", "7"))
 
+# DuckDB resources for the ETL builds (unset = DuckDB defaults: ~80% of RAM,
+# temp files next to the database)
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT") or None  # e.g. "4GB"
+DUCKDB_TEMP_DIR = os.getenv("DUCKDB_TEMP_DIR") or None
+
+# Bronze read strategy: "union_only" (one multi-file read) | "per_year" (one SELECT per year)
+BRONZE_MODE = os.getenv("BRONZE_MODE", "union_only")
+# Per-year Parquet copies of Bronze; a year is re-read from CSV only when its
+# URL or ETag changes. BRONZE_PARQUET_CACHE=0 always re-reads every CSV.
+BRONZE_PARQUET_CACHE = os.getenv("BRONZE_PARQUET_CACHE", "1") != "0"
+BRONZE_PARQUET_DIR = Path(os.getenv("BRONZE_PARQUET_DIR", RAW_DIR / "bronze_parquet"))
+
+# Portable Parquet copy of silver.cases, rewritten on every silver build
+# (SILVER_PARQUET=0 disables it).
+SILVER_PARQUET = os.getenv("SILVER_PARQUET", "1") != "0"
+SILVER_PARQUET_PATH = Path(os.getenv("SILVER_PARQUET_PATH", DATA_DIR / "silver" / "cases.parquet"))
+
+# CKAN lookup of the live 2025 resource: cached on disk for CKAN_CACHE_TTL seconds
+# (0 disables the cache).
+CKAN_CACHE_TTL = int(os.getenv("CKAN_CACHE_TTL", "3600"))
+CKAN_CACHE_PATH = Path(os.getenv("CKAN_CACHE_PATH", RAW_DIR / ".ckan_cache.json"))
+
 # Manifests
 DATA_URLS_PATH = Path(os.getenv("DATA_URLS_PATH", RAW_DIR / "data_urls.json"))
@@ -3,10 +3,28 @@ DuckDB helpers: robust connections with schema selection and optional retries.
 """
 from __future__ import annotations
 
+import random
 import time
-from typing import Optional
+import weakref
+from typing import Dict, FrozenSet, Optional, Tuple
 import duckdb
 
+# Per-connection catalog snapshots: {con: {(schema, table): columns}}.
+# Weak keys, so entries go away with the connection (no stale id() reuse).
+_COLUMNS_CACHE: "weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, Dict[Tuple[str, str], FrozenSet[str]]]"
+_COLUMNS_CACHE = weakref.WeakKeyDictionary()
+
+# Known fragments of DuckDB's file-lock IOException (lower-cased).
+_LOCK_ERROR_MARKERS = ("could not set lock", "lock on file", "conflicting lock")
+# Upper bound for a single backoff sleep.
+_MAX_LOCK_WAIT_S = 10.0
+
+
+def _is_lock_error(exc: BaseException) -> bool:
+    """True for a DuckDB IOException raised because another process holds the file lock."""
+    msg = str(exc).lower()
+    return isinstance(exc, duckdb.IOException) and any(m in msg for m in _LOCK_ERROR_MARKERS)
+
 
 def connect(
     db_path: str | bytes | "os.PathLike[str] | os.PathLike[bytes]",
@@ -15,34 +33,88 @@ def connect(
     schema: Optional[str] = None,
     retries: int = 6,
     wait_seconds: float = 1.25,
+    threads: Optional[int] = None,
+    memory_limit: Optional[str] = None,
+    temp_directory: Optional[str] = None,
 ) -> duckdb.DuckDBPyConnection:
     """
-    Connect to DuckDB, optionally set active schema, and retry if locked.
+    Connect to DuckDB, optionally set active schema and resource limits, and retry if locked.
 
     Args:
         db_path: DuckDB file path.
         read_only: Open in read-only mode.
         schema: If provided, ensures the schema exists (when not read-only)
             and sets it as the active schema.
-        retries: Number of lock retries (writer lock).
-        wait_seconds: Backoff between retries.
+        retries: Number of connection attempts while the file is locked.
+        wait_seconds: Base backoff; doubles per attempt (capped) plus jitter.
+        threads: Worker threads for this connection (None = DuckDB default).
+        memory_limit: Memory cap such as "4GB" (None = DuckDB default).
+        temp_directory: Spill directory for larger-than-memory operators.
 
     Returns:
         A DuckDB connection positioned at the requested schema.
     """
     last_exc = None
-    for _ in range(max(1, retries)):
+    attempts = max(1, retries)
+    for attempt in range(attempts):
         try:
             con = duckdb.connect(str(db_path), read_only=read_only)
+        except duckdb.IOException as exc:
+            if not _is_lock_error(exc):
+                raise
+            last_exc = exc
+            if attempt + 1 < attempts:
+                delay = min(wait_seconds * (2 ** attempt), _MAX_LOCK_WAIT_S)
+                time.sleep(delay + random.uniform(0, 0.1))
+            continue
+        try:
+            if threads:
+                con.execute(f"SET threads = {int(threads)};")
+            if memory_limit:
+                con.execute("SET memory_limit = ?;", [memory_limit])
+            if temp_directory:
+                con.execute("SET temp_directory = ?;", [str(temp_directory)])
             if schema:
                 if not read_only:
                     con.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
                 con.execute(f"SET schema '{schema}';")
-            return con
-        except duckdb.IOException as exc:
-            last_exc = exc
-            if "lock" in str(exc).lower():
-                time.sleep(wait_seconds)
-                continue
+        except Exception:
+            con.close()  # a bad setting (e.g. memory_limit="lots") must not leak the file lock
             raise
+        return con
     raise RuntimeError(f"DuckDB locked: {last_exc}") from last_exc
+
+
+def list_columns(
+    con: duckdb.DuckDBPyConnection, schema: str, table: str, *, refresh: bool = False
+) -> FrozenSet[str]:
+    """
+    Return the column names of schema.table, cached per connection.
+
+    One information_schema query per (connection, schema, table); later
+    lookups are a set membership test. Pass refresh=True after altering the
+    table on the same connection.
+
+    Args:
+        con: Open DuckDB connection.
+        schema: Schema name.
+        table: Table (or view) name.
+        refresh: Ignore the cached snapshot and re-read the catalog.
+
+    Returns:
+        Frozen set of column names (empty if the table does not exist).
+    """
+    per_con = _COLUMNS_CACHE.setdefault(con, {})
+    key = (schema, table)
+    if refresh or key not in per_con:
+        rows = con.execute(
+            """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = ?
+              AND table_name = ?
+            """,
+            [schema, table],
+        ).fetchall()
+        per_con[key] = frozenset(r[0] for r in rows)
+    return per_con[key]
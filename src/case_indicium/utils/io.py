@@ -2,20 +2,81 @@ from __future__ import annotations
 
 
 import json
+import os
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from case_indicium.utils.config import CKAN_CACHE_PATH, CKAN_CACHE_TTL
+
+try:  # optional: parses/serializes bytes directly (no str round-trip)
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 CKAN_API = "https://opendatasus.saude.gov.br/api/3/action/package_show"
 # The current public package id for SRAG dataset that contains 2019–2025 resources:
 PACKAGE_ID = "srag-2021-a-2024"
 
+# Shared session: keeps the TCP/TLS connection to opendatasus alive between calls
+# and retries transient failures (GET/HEAD) with exponential backoff.
+_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=2, max_retries=_RETRY))
+
+
+def _load_json(path: Path) -> Any:
+    """Parse a UTF-8 JSON file (orjson on the raw bytes when available)."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _dump_json_pretty(path: Path, obj: Any) -> None:
+    """Atomically write `obj` as 2-space indented UTF-8 JSON (same bytes with or without orjson)."""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_ckan_cache(package_id: str) -> Optional[str]:
+    """Return the cached 2025 URL for `package_id` if younger than CKAN_CACHE_TTL."""
+    if CKAN_CACHE_TTL <= 0:
+        return None
+    try:
+        data = _load_json(CKAN_CACHE_PATH)
+    except (OSError, ValueError):
+        return None
+    if data.get("package_id") != package_id or not data.get("url"):
+        return None
+    if time.time() - float(data.get("fetched_at", 0)) >= CKAN_CACHE_TTL:
+        return None
+    return str(data["url"])
+
+
+def _write_ckan_cache(package_id: str, url: str) -> None:
+    """Best-effort write of the CKAN lookup cache (failures are ignored)."""
+    payload = {"package_id": package_id, "url": url, "fetched_at": time.time()}
+    try:
+        CKAN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CKAN_CACHE_PATH.write_text(json.dumps(payload), encoding="utf-8")
+    except OSError:
+        pass
+
 
 def get_latest_2025_csv_url(package_id: str = PACKAGE_ID, timeout: float = 30.0) -> str:
     """Return the latest CSV URL for the '2025 - Banco vivo' SRAG resource on OpenDataSUS.
 
     This function queries the CKAN API for the given package and finds the CSV
     resource whose name contains '2025' and 'Banco vivo' (case-insensitive).
+    The result is cached on disk (CKAN_CACHE_PATH) for CKAN_CACHE_TTL seconds.
 
     Args:
         package_id: CKAN package identifier (slug or UUID).
@@ -28,7 +89,11 @@ def get_latest_2025_csv_url(package_id: str = PACKAGE_ID, timeout: float = 30.0)
         requests.HTTPError: If the HTTP call fails.
         RuntimeError: If the CKAN response indicates failure or no matching resource is found.
     """
-    resp = requests.get(CKAN_API, params={"id": package_id}, timeout=timeout)
+    cached = _read_ckan_cache(package_id)
+    if cached:
+        return cached
+
+    resp = _SESSION.get(CKAN_API, params={"id": package_id}, timeout=timeout)
     resp.raise_for_status()
     payload = resp.json()
     if not payload.get("success"):
@@ -38,6 +103,7 @@ def get_latest_2025_csv_url(package_id: str = PACKAGE_ID, timeout: float = 30.0)
         name = (res.get("name") or "").lower()
         fmt = (res.get("format") or "").upper()
         if "2025" in name and "banco vivo" in name and fmt == "CSV":
+            _write_ckan_cache(package_id, res["url"])
             return res["url"]
 
     raise RuntimeError("CSV resource for 2025 'Banco vivo' not found on CKAN.")
@@ -48,7 +114,8 @@ def refresh_2025_url_in_manifest(manifest_path: str | Path) -> Dict[str, str]:
 
     This function reads the given JSON manifest mapping year->URL, replaces the
     '2025' entry with the live 'Banco vivo' URL resolved from CKAN, writes the
-    updated JSON back to disk, and returns the mapping.
+    updated JSON back to disk (atomically, and only when the URL changed), and
+    returns the mapping.
 
     Args:
         manifest_path: Path to the JSON manifest, e.g. 'data/raw/data_urls.json'.
@@ -62,12 +129,13 @@ def refresh_2025_url_in_manifest(manifest_path: str | Path) -> Dict[str, str]:
         RuntimeError: If the CKAN lookup fails to find the 2025 CSV.
     """
     p = Path(manifest_path)
-    mapping: Dict[str, str] = json.loads(p.read_text(encoding="utf-8"))
-
-    # Always refresh 2025 to the latest live CSV
-    mapping["2025"] = get_latest_2025_csv_url()
+    mapping: Dict[str, str] = _load_json(p)
 
-    p.write_text(json.dumps(mapping, indent=2, ensure_ascii=False), encoding="utf-8")
+    # Always refresh 2025 to the latest live CSV; rewrite only if it changed
+    latest = get_latest_2025_csv_url()
+    if mapping.get("2025") != latest:
+        mapping["2025"] = latest
+        _dump_json_pretty(p, mapping)
     return mapping
 
 def load_year_url_manifest(path: Path) -> Dict[str, str]:
@@ -80,7 +148,37 @@ def load_year_url_manifest(path: Path) -> Dict[str, str]:
     Returns:
         Dict mapping year to url. Raises ValueError for empty manifests.
     """
-    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    data = _load_json(Path(path))
     if not isinstance(data, dict) or not data:
         raise ValueError(f"Invalid or empty manifest at {path}")
     return {str(k): str(v) for k, v in data.items()}
+
+
+def resource_etag(url: str, timeout: float = 15.0) -> Optional[str]:
+    """Return a change token for a CSV source: HTTP ETag (or Last-Modified+size), or mtime+size for local files.
+
+    Args:
+        url: HTTP(S) URL or local path from the manifest.
+        timeout: HTTP timeout in seconds for the HEAD request.
+
+    Returns:
+        An opaque string that changes when the resource changes, or None when unknown
+        (callers should then treat the resource as changed).
+    """
+    if not url.lower().startswith(("http://", "https://")):
+        try:
+            st = Path(url).stat()
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns}-{st.st_size}"
+    try:
+        resp = _SESSION.head(url, allow_redirects=True, timeout=timeout)
+        resp.raise_for_status()
+    except requests.RequestException:
+        return None
+    h = resp.headers
+    if h.get("ETag"):
+        return h["ETag"]
+    if h.get("Last-Modified"):
+        return f"{h['Last-Modified']}|{h.get('Content-Length', '')}"
+    return None
@@ -15,30 +15,38 @@ Run:
 
 from __future__ import annotations
 
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
 import streamlit as st
 from dotenv import load_dotenv
 
-from case_indicium.agent.sql_client import SQLClient
+from case_indicium.agent.sql_client import SQLClient, resolve_db_path
 from case_indicium.agent.metrics import (
     get_as_of_day,
     get_kpis_30d_br,
-    get_daily_30d_br,
-    get_monthly_12m_br,
+    get_series_bundle_columnar,
 )
-from case_indicium.agent.intent_router import handle as agent_handle, Intent
 from case_indicium.agent.queries import (
     SQL_TOP_UF_CASES_30D,
+    SQL_UF_LIST,
     SQL_DAILY_30D_UF,
     SQL_MONTHLY_12M_UF,
-    SQL_KPIS_30D_UF,
+    SQL_KPIS_BUNDLE_UF,
 )
 
+# Plotly (in the plot helpers) and the agent stack (pydantic, LLM clients; see
+# _agent) are imported on first use, so the header/sidebar/KPIs render first.
+if TYPE_CHECKING:
+    from case_indicium.agent.intent_router import Intent
+
 # -----------------------------------------------------------------------------
 # Bootstrap
 # -----------------------------------------------------------------------------
@@ -57,6 +65,7 @@ st.set_page_config(
 st.markdown(
     """
     <style>
+      .kpi-row { display:grid; grid-template-columns:repeat(4, 1fr); gap:1rem; }
       .kpi-card { padding:16px; border-radius:16px; background:#0F172A; color:#E2E8F0; border:1px solid #1E293B; }
       .kpi-value { font-size:1.8rem; font-weight:700; margin-top:4px; }
       .kpi-label { font-size:0.95rem; color:#94A3B8; }
@@ -69,35 +78,57 @@ st.markdown(
 # Helpers
 # -----------------------------------------------------------------------------
 
+# Shared chart styling (built once; Streamlit reruns the script on every interaction)
+_LAYOUT: Dict[str, Any] = dict(
+    template="plotly_dark",
+    height=360,
+    margin=dict(l=16, r=16, t=48, b=16),
+    hovermode="x unified",
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font=dict(size=14),
+)
+_XGRID: Dict[str, Any] = dict(showgrid=False)
+_YGRID: Dict[str, Any] = dict(gridcolor="rgba(255,255,255,0.08)")
+
+
 def style_fig(fig, *, title: Optional[str] = None):
     """Apply a clean dark theme and better hover to a Plotly figure."""
+    fig.update_layout(**_LAYOUT)
+    fig.update_xaxes(**_XGRID)
+    fig.update_yaxes(**_YGRID)
     if title:
         fig.update_layout(title=title)
-    fig.update_layout(
-        template="plotly_dark",
-        height=360,
-        margin=dict(l=16, r=16, t=48, b=16),
-        hovermode="x unified",
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(size=14),
-    )
-    fig.update_xaxes(showgrid=False)
-    fig.update_yaxes(gridcolor="rgba(255,255,255,0.08)")
     return fig
 
 
-def _series_to_df(series) -> pd.DataFrame:
-    """Convert Series(label, points[x,y]) into a tidy DataFrame."""
-    rows = []
-    for p in series.points:
-        x = p.x.isoformat() if hasattr(p.x, "isoformat") else str(p.x)
-        rows.append({"x": x, "y": float(p.y)})
-    return pd.DataFrame(rows)
+def _series_to_table(series) -> pa.Table:
+    """Convert a SeriesColumnar (ISO-date xs, float ys) into an x/y Arrow table."""
+    return pa.table({"x": series.xs, "y": series.ys})
+
+
+def _xy_table(tbl: pa.Table) -> pa.Table:
+    """
+    (date, SUM) query result -> x/y Arrow table shaped like _series_to_table:
+    ISO-date string x (one vectorized date32 -> string cast) and float64 y
+    (SUM comes back as DECIMAL).
+    """
+    return pa.table({"x": tbl.column(0).cast(pa.string()), "y": tbl.column(1).cast(pa.float64())})
 
 
-def kpi_card(label: str, value: Optional[float | int], *, fmt: str = "auto"):
-    """Render a KPI card with consistent style."""
+def _num_rows(data: pd.DataFrame | pa.Table) -> int:
+    return data.num_rows if isinstance(data, pa.Table) else len(data)
+
+
+def _xy_arrays(data: pd.DataFrame | pa.Table):
+    """(x, y) numpy arrays from an x/y DataFrame or Arrow table."""
+    if isinstance(data, pa.Table):
+        return data.column("x").to_numpy(), data.column("y").to_numpy()
+    return data["x"].to_numpy(), data["y"].to_numpy()
+
+
+def _card_html(label: str, value: Optional[float | int], fmt: str = "auto") -> str:
+    """HTML for one KPI card (pure; rendered by kpi_row)."""
     if value is None:
         display = "—"
     else:
@@ -108,32 +139,40 @@ def kpi_card(label: str, value: Optional[float | int], *, fmt: str = "auto"):
         else:
             display = str(value)
 
-    st.markdown(
-        f"""
-        <div class="kpi-card">
-          <div class="kpi-label">{label}</div>
-          <div class="kpi-value">{display}</div>
-        </div>
-        """,
-        unsafe_allow_html=True,
+    return (
+        f'<div class="kpi-card"><div class="kpi-label">{label}</div>'
+        f'<div class="kpi-value">{display}</div></div>'
     )
 
 
-def plot_line(df: pd.DataFrame, title: str, y_label: str):
-    if df.empty:
+def kpi_row(items) -> None:
+    """Render all KPI cards as one grid in a single st.markdown (one frontend element)."""
+    cards = "".join(_card_html(label, value, fmt) for label, value, fmt in items)
+    st.markdown(f'<div class="kpi-row">{cards}</div>', unsafe_allow_html=True)
+
+
+def plot_line(df: pd.DataFrame | pa.Table, title: str, y_label: str):
+    if _num_rows(df) == 0:
         st.info("Sem dados para o gráfico.")
         return
-    fig = px.line(df, x="x", y="y", markers=True)
+    import plotly.graph_objects as go
+
+    # graph_objects directly (no Plotly Express frame copy); WebGL line
+    x, y = _xy_arrays(df)
+    fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines+markers"))
     fig.update_traces(hovertemplate=f"<b>%{{x}}</b><br>{y_label}: %{{y:,.0f}}")
     style_fig(fig, title=title)
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_bar(df: pd.DataFrame, title: str, y_label: str):
-    if df.empty:
+def plot_bar(df: pd.DataFrame | pa.Table, title: str, y_label: str):
+    if _num_rows(df) == 0:
         st.info("Sem dados para o gráfico.")
         return
-    fig = px.bar(df, x="x", y="y")
+    import plotly.graph_objects as go
+
+    x, y = _xy_arrays(df)
+    fig = go.Figure(go.Bar(x=x, y=y))
     fig.update_traces(hovertemplate=f"<b>%{{x}}</b><br>{y_label}: %{{y:,.0f}}")
     style_fig(fig, title=title)
     st.plotly_chart(fig, use_container_width=True)
@@ -143,8 +182,10 @@ def top_uf_bar(df: pd.DataFrame, title: str):
     if df.empty:
         st.info("Sem dados de UF.")
         return
-    df2 = df.sort_values("cases_30d", ascending=False)
-    fig = px.bar(df2, x="uf", y="cases_30d")
+    import plotly.graph_objects as go
+
+    # rows arrive ordered by SQL_TOP_UF_CASES_30D (ORDER BY cases_30d DESC)
+    fig = go.Figure(go.Bar(x=df["uf"].to_numpy(), y=df["cases_30d"].to_numpy()))
     fig.update_traces(hovertemplate="<b>%{x}</b><br>casos (30d): %{y:,.0f}")
     style_fig(fig, title=title)
     st.plotly_chart(fig, use_container_width=True)
@@ -154,54 +195,175 @@ def top_uf_bar(df: pd.DataFrame, title: str):
 # Data loaders (cached)
 # -----------------------------------------------------------------------------
 
-@st.cache_data(ttl=300)
-def load_br_data() -> Dict[str, Any]:
-    """Load Brazil-scope KPIs and series from DuckDB."""
-    sql = SQLClient()
-    as_of = get_as_of_day(sql)
-    kpis = get_kpis_30d_br(sql)
-    daily = get_daily_30d_br(sql)
-    monthly = get_monthly_12m_br(sql)
-    top_ufs = sql.df(SQL_TOP_UF_CASES_30D)
+# UF queries inline the (validated) UF as a literal by default: DuckDB can plan a
+# literal predicate faster than a bound parameter. USE_PARAM_QUERIES=1 binds $uf
+# as a regular DuckDB parameter instead.
+USE_PARAM_QUERIES = os.getenv("USE_PARAM_QUERIES", "0") == "1"
+
+
+def _uf_query(sql_text: str, uf: str) -> tuple[str, Optional[Dict[str, Any]]]:
+    """(sql, params) for a `$uf` query: literal-substituted unless USE_PARAM_QUERIES."""
+    if USE_PARAM_QUERIES:
+        return sql_text, {"uf": uf}
+    return sql_text.replace("$uf", "'" + uf.replace("'", "''") + "'"), None
+
+
+# Bump when the shape of the cached loader payloads changes (invalidates disk pickles).
+CACHE_VERSION = "v3"
+
+
+def _data_version() -> str:
+    """
+    Cache key for the loaders: CACHE_VERSION + DuckDB file mtime, so a rerun after
+    an ETL/gold build loads fresh data (no restart needed: the app holds no
+    connection between loads).
+    """
+    try:
+        mtime = resolve_db_path().stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+    return f"{CACHE_VERSION}:{mtime}"
+
+
+def _run_pooled(client: SQLClient, fn):
+    """Run fn(sql) on a pooled cursor: each worker thread gets its own connection handle."""
+    with client.pooled() as sql:
+        return fn(sql)
+
+
+def _top_ufs(sql: SQLClient) -> pd.DataFrame:
+    """UF ranking (30d) with `uf` as a categorical (27 labels -> int8 codes)."""
+    df = sql.df(SQL_TOP_UF_CASES_30D)
+    df["uf"] = df["uf"].astype("category")
+    return df
+
+
+# Independent BR queries; the series bundle returns daily 30d + monthly 12m in one statement.
+_BR_LOADERS = {
+    "as_of": get_as_of_day,
+    "kpis": get_kpis_30d_br,
+    "series": get_series_bundle_columnar,
+    "top_ufs": _top_ufs,
+}
+
+
+# persist="disk": cached payloads survive Streamlit restarts. Persistent caches
+# ignore ttl, so freshness comes from the data_version argument instead.
+@st.cache_data(persist="disk", show_spinner=False)
+def load_br_data(data_version: str) -> Dict[str, Any]:
+    """Load Brazil-scope KPIs and series from DuckDB (independent queries run concurrently)."""
+    # One connection per load, shared by the workers through pooled cursors and
+    # closed on exit: a held read-only handle would block the ETL writer's lock.
+    with SQLClient() as client, ThreadPoolExecutor(max_workers=len(_BR_LOADERS)) as pool:
+        futures = {key: pool.submit(_run_pooled, client, fn) for key, fn in _BR_LOADERS.items()}
+        res = {key: fut.result() for key, fut in futures.items()}
 
     return {
-        "as_of": as_of,
-        "kpis": kpis,
-        "daily_df": _series_to_df(daily),
-        "monthly_df": _series_to_df(monthly),
-        "top_ufs": top_ufs,
+        "as_of": res["as_of"],
+        "kpis": res["kpis"],
+        "daily_df": _series_to_table(res["series"]["daily"]),
+        "monthly_df": _series_to_table(res["series"]["monthly"]),
+        "top_ufs": res["top_ufs"],
     }
 
 
-@st.cache_data(ttl=300)
-def load_uf_data(uf: str) -> Dict[str, Any]:
-    """Load UF-scope KPIs and series from DuckDB (parameterized)."""
-    sql = SQLClient()
-    as_of = get_as_of_day(sql)
-
-    kpi_df = sql.df(SQL_KPIS_30D_UF, params={"uf": uf})
-    if kpi_df.empty:
-        kpi_payload: Dict[str, Any] = {
-            "growth_7d_pct": None,
-            "cfr_closed_30d_pct": None,
-            "icu_rate_30d_pct": None,
-            "vaccinated_rate_30d_pct": None,
-        }
-    else:
-        row = kpi_df.iloc[0]
-        kpi_payload = {
-            "growth_7d_pct": None,  # (opcional) adicionar via SQL_GROWTH_7D_UF no futuro
-            "cfr_closed_30d_pct": row.get("cfr_closed_30d_pct"),
-            "icu_rate_30d_pct": row.get("icu_rate_30d_pct"),
-            "vaccinated_rate_30d_pct": row.get("vaccinated_rate_30d_pct"),
-        }
-
-    daily_df = sql.df(SQL_DAILY_30D_UF, params={"uf": uf}).rename(columns={"day": "x", "cases": "y"})
-    monthly_df = sql.df(SQL_MONTHLY_12M_UF, params={"uf": uf}).rename(columns={"month": "x", "cases": "y"})
+@st.cache_data(persist="disk", show_spinner=False)
+def load_uf_list(data_version: str) -> list[str]:
+    """Sorted UFs in gold (a small list, so the sidebar never unpickles the BR payload)."""
+    with SQLClient() as sql:
+        return sql.df(SQL_UF_LIST)["uf"].tolist()
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def load_uf_data(uf: str, data_version: str) -> Dict[str, Any]:
+    """Load UF-scope KPIs and series from DuckDB (UF inlined as a literal, see _uf_query)."""
+    if uf not in load_uf_list(data_version):
+        raise ValueError(f"UF desconhecida: {uf!r}")
+
+    with SQLClient() as sql:
+        as_of = get_as_of_day(sql)
+        # growth 7d + 30d KPIs in one scan (same bundle as the BR path)
+        kpi_rows = sql.arrow(*_uf_query(SQL_KPIS_BUNDLE_UF, uf)).slice(0, 1).to_pylist()
+        daily_df = _xy_table(sql.arrow(*_uf_query(SQL_DAILY_30D_UF, uf)))
+        monthly_df = _xy_table(sql.arrow(*_uf_query(SQL_MONTHLY_12M_UF, uf)))
+
+    row = kpi_rows[0] if kpi_rows else {}
+    kpi_payload: Dict[str, Any] = {
+        "growth_7d_pct": row.get("growth_7d_pct"),
+        "cfr_closed_30d_pct": row.get("cfr_closed_30d_pct"),
+        "icu_rate_30d_pct": row.get("icu_rate_30d_pct"),
+        "vaccinated_rate_30d_pct": row.get("vaccinated_rate_30d_pct"),
+    }
 
     return {"as_of": as_of, "kpis": kpi_payload, "daily_df": daily_df, "monthly_df": monthly_df}
 
 
+# NL→SQL goes through the LLM; identical questions on the same data reuse the
+# result (kept in memory only, as an Arrow table so reruns skip pandas conversion).
+@st.cache_data(show_spinner=False, max_entries=64)
+def run_nl_query(question: str, data_version: str) -> tuple[pa.Table, str]:
+    """(result table, SQL used) for a natural-language question (up to 1000 rows)."""
+    from case_indicium.agent.tools import query_nl
+
+    df, sql_used = query_nl(question, max_rows=1000)
+    return pa.Table.from_pandas(df, preserve_index=False), sql_used
+
+
+def render_nl_result(nl: Dict[str, Any]) -> None:
+    """Full NLQUERY table + generated SQL, as stashed on the assistant message."""
+    st.caption("Resultado (até 1000 linhas):")
+    st.dataframe(nl["table"], use_container_width=True)
+    with st.expander("SQL gerado"):
+        st.code(nl["sql"], language="sql")
+
+
+_STREAM_CUT_NOTICE = "_⚠️ Resposta interrompida: a geração falhou antes do fim. Tente novamente._"
+
+
+def write_reply_stream(reply_stream) -> str:
+    """
+    st.write_stream the reply and return its Markdown for the history.
+
+    If the stream fails after some chunks were rendered, the partial text is
+    kept and followed by a separate notice (never the bare error); a failure
+    before the first chunk shows the error message instead.
+    """
+    chunks: list[str] = []
+
+    def _collect():
+        for piece in reply_stream:
+            chunks.append(piece)
+            yield piece
+
+    try:
+        return st.write_stream(_collect())
+    except Exception as exc:
+        partial = "".join(chunks)
+        if not partial:
+            reply_md = f"Erro ao processar sua solicitação: `{exc}`"
+            st.markdown(reply_md)
+            return reply_md
+        st.markdown(_STREAM_CUT_NOTICE)
+        return f"{partial}\n\n{_STREAM_CUT_NOTICE}"
+
+
+_HISTORY_SEP = "\n\n---\n\n"
+
+
+def render_history(messages) -> None:
+    """Replay the chat: one chat_message + st.markdown per run of same-role messages."""
+    for role, run in groupby(messages, key=itemgetter("role")):
+        texts = []
+        for m in run:
+            texts.append(m["content"])
+            if "nl" in m:  # the result table sits below its message, outside the bubble
+                st.chat_message(role).markdown(_HISTORY_SEP.join(texts))
+                render_nl_result(m["nl"])
+                texts = []
+        if texts:
+            st.chat_message(role).markdown(_HISTORY_SEP.join(texts))
+
+
 # -----------------------------------------------------------------------------
 # UI — header + sidebar
 # -----------------------------------------------------------------------------
@@ -221,8 +383,7 @@ with st.sidebar:
     scope_label = st.radio("Escopo", ["Brasil", "UF"], horizontal=True)
     chosen_uf: Optional[str] = None
     if scope_label == "UF":
-        brtmp = load_br_data()
-        uf_opts = sorted(brtmp["top_ufs"]["uf"].unique().tolist())
+        uf_opts = load_uf_list(_data_version())
         chosen_uf = st.selectbox("Selecione a UF", uf_opts, index=(uf_opts.index("SP") if "SP" in uf_opts else 0))
 
 # -----------------------------------------------------------------------------
@@ -230,14 +391,14 @@ with st.sidebar:
 # -----------------------------------------------------------------------------
 
 if scope_label == "Brasil":
-    data = load_br_data()
+    data = load_br_data(_data_version())
     as_of = data["as_of"]
     kpis = data["kpis"]
     daily_df = data["daily_df"]
     monthly_df = data["monthly_df"]
     top_ufs = data["top_ufs"]
 else:
-    data = load_uf_data(chosen_uf)
+    data = load_uf_data(chosen_uf, _data_version())
     as_of = data["as_of"]
     kpis = data["kpis"]
     daily_df = data["daily_df"]
@@ -250,19 +411,16 @@ st.caption(f"Data as of: **{as_of or 'n/a'}**")
 # KPI row
 # -----------------------------------------------------------------------------
 
-c1, c2, c3, c4 = st.columns(4)
-with c1:
-    val = kpis.get("growth_7d_pct") if isinstance(kpis, dict) else kpis.growth_7d_pct
-    kpi_card("Crescimento (7d vs 7 prev.)", val, fmt="pct")
-with c2:
-    val = kpis.get("cfr_closed_30d_pct") if isinstance(kpis, dict) else kpis.cfr_closed_30d_pct
-    kpi_card("CFR (casos encerrados, 30d)", val, fmt="pct")
-with c3:
-    val = kpis.get("icu_rate_30d_pct") if isinstance(kpis, dict) else kpis.icu_rate_30d_pct
-    kpi_card("% casos com UTI (30d)", val, fmt="pct")
-with c4:
-    val = kpis.get("vaccinated_rate_30d_pct") if isinstance(kpis, dict) else kpis.vaccinated_rate_30d_pct
-    kpi_card("% casos com vacinação (30d)", val, fmt="pct")
+def _kpi(name: str):
+    return kpis.get(name) if isinstance(kpis, dict) else getattr(kpis, name)
+
+
+kpi_row([
+    ("Crescimento (7d vs 7 prev.)", _kpi("growth_7d_pct"), "pct"),
+    ("CFR (casos encerrados, 30d)", _kpi("cfr_closed_30d_pct"), "pct"),
+    ("% casos com UTI (30d)", _kpi("icu_rate_30d_pct"), "pct"),
+    ("% casos com vacinação (30d)", _kpi("vaccinated_rate_30d_pct"), "pct"),
+])
 
 # -----------------------------------------------------------------------------
 # Charts
@@ -287,6 +445,15 @@ st.divider()
 
 st.subheader("🤖 Chat do Agente")
 
+
+@functools.cache
+def _agent():
+    """intent_router, imported on the first chat message (not at app boot)."""
+    from case_indicium.agent import intent_router
+
+    return intent_router
+
+
 # estado de conversa
 if "last_intent" not in st.session_state:
     st.session_state.last_intent: Optional[Intent] = None
@@ -294,8 +461,7 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 
 # render histórico
-for m in st.session_state.messages:
-    st.chat_message(m["role"]).markdown(m["content"])
+render_history(st.session_state.messages)
 
 # user input
 user_text = st.chat_input(
@@ -307,32 +473,39 @@ user_text = st.chat_input(
 )
 
 if user_text:
+    agent = _agent()
     st.session_state.messages.append({"role": "user", "content": user_text})
     st.chat_message("user").markdown(user_text)
 
+    # LLM intents stream token by token; the others arrive as a single chunk
+    reply_stream = None
     try:
-        reply_md, new_intent = agent_handle(user_text, previous_intent=st.session_state.last_intent)
+        reply_stream, new_intent = agent.handle_stream(user_text, previous_intent=st.session_state.last_intent)
         st.session_state.last_intent = new_intent  # mantém contexto para follow-ups
     except TypeError:
         # compat: intent_router antigo sem previous_intent
-        reply_md, new_intent = agent_handle(user_text)
-        st.session_state.last_intent = new_intent if isinstance(new_intent, Intent) else st.session_state.last_intent
+        reply_md, new_intent = agent.handle(user_text)
+        st.session_state.last_intent = new_intent if isinstance(new_intent, agent.Intent) else st.session_state.last_intent
     except Exception as exc:
         reply_md = f"Erro ao processar sua solicitação: `{exc}`"
         new_intent = None
 
     # resposta principal (markdown)
-    st.session_state.messages.append({"role": "assistant", "content": reply_md})
-    st.chat_message("assistant").markdown(reply_md)
-
-    # Se for NLQUERY, renderize a tabela inteira (até 1000 linhas) e o SQL
-    if isinstance(new_intent, Intent) and new_intent.kind == "nlquery":
+    with st.chat_message("assistant"):
+        if reply_stream is None:
+            st.markdown(reply_md)
+        else:
+            reply_md = write_reply_stream(reply_stream)
+    reply_msg: Dict[str, Any] = {"role": "assistant", "content": reply_md}
+    st.session_state.messages.append(reply_msg)
+
+    # Se for NLQUERY, renderize a tabela inteira (até 1000 linhas) e o SQL.
+    # O resultado fica na mensagem: reruns seguintes o re-renderizam do histórico
+    # sem chamar query_nl de novo.
+    if isinstance(new_intent, agent.Intent) and new_intent.kind == "nlquery":
         try:
-            from case_indicium.agent.tools import query_nl
-            df, sql_used = query_nl(user_text, max_rows=1000)
-            st.caption("Resultado (até 1000 linhas):")
-            st.dataframe(df, use_container_width=True)
-            with st.expander("SQL gerado"):
-                st.code(sql_used, language="sql")
+            table, sql_used = run_nl_query(user_text, _data_version())
+            reply_msg["nl"] = {"table": table, "sql": sql_used}
+            render_nl_result(reply_msg["nl"])
         except Exception as exc:
             st.warning(f"Não consegui renderizar a tabela completa: {exc}")